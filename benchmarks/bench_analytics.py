@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Times the analytics engine on a synthetic season.
+
+Usage: python -m benchmarks.bench_analytics [routines]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import routine_totals, team_event_scores, standoff_scores, gymnast_stats, league_table
+from src.models import Routine
+
+
+def synthetic_routines(count, *, leagues=5, teams_per_league=8, gymnasts_per_team=8, seasons=2, seed=0):
+    rng = np.random.RandomState(seed)
+    events = [event.name for event in Routine.Event]
+    teams = leagues * teams_per_league
+    standoffs = max(count // (2 * gymnasts_per_team * len(events)), 1)
+    standoff_id = rng.randint(0, standoffs, count)
+    host_id = rng.randint(0, teams, standoffs)
+    guest_id = (host_id + 1 + rng.randint(0, teams - 1, standoffs)) % teams
+    is_host = rng.rand(count) < 0.5
+    team_id = np.where(is_host, host_id[standoff_id], guest_id[standoff_id])
+    return pd.DataFrame({
+        'id': np.arange(count),
+        'E': rng.uniform(0, 4, count),
+        'D': rng.uniform(1, 6, count),
+        'event': pd.Categorical.from_codes(rng.randint(0, len(events), count), events),
+        'gymnast_id': team_id * gymnasts_per_team + rng.randint(0, gymnasts_per_team, count),
+        'standoff_id': standoff_id,
+        'team_id': team_id,
+        'league_id': team_id // teams_per_league,
+        'season': 2018 - standoff_id % seasons,
+        'host_id': host_id[standoff_id],
+        'guest_id': guest_id[standoff_id],
+        'standoff_league_id': host_id[standoff_id] // teams_per_league,
+    })
+
+
+def main(count=50000, repeat=5):
+    routines = synthetic_routines(count)
+    stages = [
+        ('routine_totals', routine_totals),
+        ('team_event_scores', team_event_scores),
+        ('standoff_scores', standoff_scores),
+        ('gymnast_stats', gymnast_stats),
+        ('league_table', league_table),
+    ]
+    print(f'{count} routines, best of {repeat}')
+    overall = 0
+    for name, stage in stages:
+        best = float('inf')
+        for _ in range(repeat):
+            start = perf_counter()
+            stage(routines)
+            best = min(best, perf_counter() - start)
+        overall += best
+        print(f'{name:>20}: {best * 1000:8.1f} ms')
+    print(f'{"total":>20}: {overall * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Times the whole pipeline against a local stand-in for kutu.stb-liga.de.
+
+Serves benchmarks/site, whose page fills the indexdb stores with a configurable amount of records, and times driver
+start, tab open, extraction per table, cleanup, loading the cleaned stores into the database and exporting it. Results are saved as json and can be
+compared with an earlier run.
+
+Usage: python -m benchmarks.bench_e2e [--rows N] [--repeat N] [--driver PATH] [--skip-browser] [--compare FILE]
+"""
+import argparse
+import functools
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.exporting import export_tables, stream_tables
+from src.loading import load_dataframes
+from src.mapping import to_model_frames
+from src.processing import STB_DB_CLEANUP_MAP
+from src.stores import STB_DB_STORES
+
+BENCHMARK_DIR = os.path.dirname(__file__)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+TABLES = STB_DB_STORES
+# the league names and apparatuses the stand-in uses, as the site spells them
+LEVELS = ('Oberliga', 'Verbandsliga', 'Landesliga', 'Bezirksliga', 'Kreisliga')
+EVENTS = ('Boden', 'Pauschenpferd', 'Ringe', 'Sprung', 'Barren', 'Reck')
+
+
+class Timings:
+    def __init__(self):
+        self.phases = {}
+
+    def time(self, phase, func, *args, rows=None, **kwargs):
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = perf_counter() - start
+        self.phases.setdefault(phase, {'seconds': [], 'rows': rows})['seconds'].append(elapsed)
+        return result
+
+    def summary(self):
+        ret = {}
+        for phase, data in self.phases.items():
+            seconds = np.array(data['seconds'])
+            ret[phase] = {
+                'runs': len(seconds),
+                'p50_ms': float(np.percentile(seconds, 50) * 1000),
+                'p90_ms': float(np.percentile(seconds, 90) * 1000),
+                'p99_ms': float(np.percentile(seconds, 99) * 1000),
+            }
+            if data['rows']:
+                ret[phase]['rows_per_second'] = float(data['rows'] / np.median(seconds))
+        return ret
+
+
+class _SiteHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_site():
+    handler = functools.partial(_SiteHandler, directory=os.path.join(BENCHMARK_DIR, 'site'))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kB on linux, the browser only shows up in the children once it was waited for
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {'python_mb': own / 1024, 'children_mb': children / 1024}
+
+
+def browser_phases(timings, args):
+    from src.driver import extract_index_db, STB_DB_READY
+    from src.lib.driver import Driver
+
+    server = serve_site()
+    url = f'http://127.0.0.1:{server.server_port}/index.html?rows={args.rows}&small={args.small}'
+    driver = timings.time('driver_start', Driver, path=args.driver, headless=True)
+    try:
+        for _ in range(args.repeat):
+            timings.time('tab_open', _open_tab, driver, url, STB_DB_READY)
+        for table in TABLES:
+            for _ in range(args.repeat):
+                dfs = timings.time(f'extract_async[{table}]', extract_index_db(url, [table], mode='async'), driver)
+                timings.phases[f'extract_async[{table}]']['rows'] = len(dfs[table])
+        for _ in range(args.repeat):
+            dfs = timings.time('extract_bulk', extract_index_db(url, TABLES, mode='bulk'), driver)
+        timings.phases['extract_bulk']['rows'] = sum(len(df) for df in dfs.values())
+    finally:
+        driver.quit()
+        server.shutdown()
+    return dfs
+
+
+def _open_tab(driver, url, ready):
+    with driver.open_new_tab(url, ready=ready, wait_timer=60):
+        pass
+
+
+def store_sizes(args):
+    return {
+        'begegnung': args.rows, 'person': args.rows, 'cache': args.rows,
+        'mannschaft': args.small, 'tabelle': args.small, 'verein': args.small, 'halle': args.small, 'saison': 10,
+    }
+
+
+def synthetic_record(store, i, sizes):
+    """The record `i` of a store, the same the `record` function of benchmarks/site/index.html puts into the indexdb."""
+    if store == 'tabelle':
+        return {'id': i, 'name': f'{LEVELS[i % len(LEVELS)]} {i}'}
+    elif store == 'mannschaft':
+        return {'id': i, 'name': f'TV Verein {i}', 'tabelle_id': i % max(sizes['tabelle'], 1),
+                'verein_id': i % max(sizes['verein'], 1)}
+    elif store == 'person':
+        return {'id': i, 'vorname': f'Vorname {i % 300}', 'nachname': f'Nachname {i % 1000}',
+                'mannschaft_id': i % max(sizes['mannschaft'], 1)}
+    elif store == 'begegnung':
+        teams = max(sizes['mannschaft'], 1)
+        return {
+            'id': i,
+            'saison': 2010 + i % 9,
+            'datum': f'{2010 + i % 9}-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+            'heim_id': i % teams,
+            'gast_id': (i * 7 + 1) % teams,
+            'halle': {'name': f'Halle {i % 60}', 'ort': 'Stuttgart'},
+            'punkte_heim': i % 60,
+            'punkte_gast': (i * 13) % 60,
+            'wertungen': [{
+                'person_id': (i * len(EVENTS) + k) % max(sizes['person'], 1),
+                'geraet': event,
+                'e': round(7 + (i * 31 + k * 17) % 300 / 100, 2),
+                'd': round(3 + (i * 11 + k * 29) % 300 / 100, 2),
+            } for k, event in enumerate(EVENTS)],
+        }
+    return {
+        'id': i,
+        'store': store,
+        'saison': 2010 + i % 9,
+        'datum': f'2018-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'halle': {'name': f'Halle {i % 60}', 'ort': 'Stuttgart'},
+        'punkte': i % 60,
+        'score': round(200 + (i * 37) % 100, 2),
+    }
+
+
+def synthetic_dump(args):
+    sizes = store_sizes(args)
+    return {table: pd.DataFrame([synthetic_record(table, i, sizes) for i in range(sizes[table])]) for table in TABLES}
+
+
+def processing_phases(timings, dfs, args):
+    from src.models import STBDB
+
+    rows = sum(len(df) for df in dfs.values())
+    cleaned = {}
+    for _ in range(args.repeat):
+        cleaned = timings.time('cleanup', lambda: {key: STB_DB_CLEANUP_MAP[key](df) for key, df in dfs.items()},
+                               rows=rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = STBDB(descriptor=STBDB.sqlite_descriptor(os.path.join(directory, 'bench.sqlite')))
+        # the load maps the cleaned stores onto the models itself, the rows counted are the model rows it writes
+        loaded = sum(len(df) for df in to_model_frames(cleaned).values())
+        for _ in range(args.repeat):
+            timings.time('db_load', load_dataframes, db, cleaned, rows=loaded)
+        for fmt in ('csv', 'parquet', 'xlsx'):
+            path = os.path.join(directory, 'export.xlsx' if fmt == 'xlsx' else fmt)
+            try:
+                for _ in range(args.repeat):
+                    timings.time(f'export[{fmt}]', lambda: export_tables(stream_tables(db), path, fmt), rows=loaded)
+            except ImportError as e:
+                print(f'skipping {fmt} export: {e}', file=sys.stderr)
+
+
+def compare(current, previous):
+    print(f'{"phase":>32} {"p50 before":>12} {"p50 now":>12} {"change":>8}')
+    for phase, data in current['phases'].items():
+        if phase in previous['phases']:
+            before = previous['phases'][phase]['p50_ms']
+            print(f'{phase:>32} {before:10.1f}ms {data["p50_ms"]:10.1f}ms {(data["p50_ms"] / before - 1) * 100:+7.1f}%')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='records of the large stores')
+    parser.add_argument('--small', type=int, default=500, help='records of the small stores')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per phase')
+    parser.add_argument('--driver', default=None, help='path of the geckodriver executable')
+    parser.add_argument('--skip-browser', action='store_true', help='use a synthetic dump instead of the browser')
+    parser.add_argument('--compare', help='result file of an earlier run to compare with')
+    args = parser.parse_args(argv)
+
+    timings = Timings()
+    dfs = synthetic_dump(args) if args.skip_browser else browser_phases(timings, args)
+    processing_phases(timings, dfs, args)
+
+    result = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'arguments': vars(args),
+        'phases': timings.summary(),
+        'peak_rss': peak_rss_mb(),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'e2e-{datetime.now():%Y%m%d-%H%M%S}.json')
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    print(f'saved to {path}')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Compares the ways of turning an indexdb dump into a DataFrame on a synthetic begegnung store.
+
+Usage: python -m benchmarks.bench_json [records]
+"""
+import json
+import random
+import sys
+from time import perf_counter
+
+import pandas as pd
+
+from src.lib.fastjson import frame_from_json, JSON_BACKEND
+
+
+def synthetic_begegnung(count, *, seed=0):
+    rng = random.Random(seed)
+    clubs = [f'TV Verein {i}' for i in range(40)]
+    return [{
+        'id': i,
+        'saison': 2010 + i % 9,
+        'datum': f'2018-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'heim': rng.choice(clubs),
+        'gast': rng.choice(clubs),
+        'halle': {'name': f'Halle {i % 60}', 'ort': 'Stuttgart'},
+        'punkte_heim': rng.randint(0, 60),
+        'punkte_gast': rng.randint(0, 60),
+        'score_heim': round(rng.uniform(200, 300), 2),
+        'score_gast': round(rng.uniform(200, 300), 2),
+    } for i in range(count)]
+
+
+def to_columns(rows):
+    # mirrors the toColumns js helper of the extraction scripts
+    columns = {}
+    for i, row in enumerate(rows):
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = [None] * len(rows)
+            columns[key][i] = value
+    return columns
+
+
+def per_row(text_node):
+    return pd.DataFrame([json.loads(x) for x in text_node.split('<->')[:-1]])
+
+
+def array_payload(payload):
+    return frame_from_json(payload)
+
+
+def main(count=100000, repeat=3):
+    rows = synthetic_begegnung(count)
+    text_node = ''.join(json.dumps(row) + '<->' for row in rows)
+    array = json.dumps(rows)
+    columnar = json.dumps(to_columns(rows))
+    cases = [
+        ('split + json.loads per row', per_row, text_node),
+        (f'one array decode ({JSON_BACKEND})', array_payload, array),
+        (f'one columnar decode ({JSON_BACKEND})', array_payload, columnar),
+    ]
+    print(f'{count} begegnung records, best of {repeat}')
+    for name, func, payload in cases:
+        best = float('inf')
+        for _ in range(repeat):
+            start = perf_counter()
+            df = func(payload)
+            best = min(best, perf_counter() - start)
+        assert df.shape == (count, len(rows[0]))
+        print(f'{name:>40}: {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Times CPU heavy stages run one after another in process against side by side on worker processes.
+
+Usage: python -m benchmarks.bench_offload [routines] [jobs] [processes]
+"""
+import os
+import sys
+from functools import partial
+from time import perf_counter
+
+from src.analytics import routine_totals, gymnast_stats, league_table
+from src.lib.concurrent import ConcurrentProcessor, pack, unpack
+from .bench_analytics import synthetic_routines
+
+
+def run(routines, jobs, process_workers):
+    processor = ConcurrentProcessor(max_workers=jobs, process_workers=process_workers)
+    try:
+        # starts the worker processes, which import pandas once
+        [fut.result() for fut in [processor.offload(gymnast_stats, routines.head(10)) for _ in range(jobs)]]
+        start = perf_counter()
+        stages = [gymnast_stats, partial(league_table, top_n=3)] * (jobs // 2 + 1)
+        [fut.result() for fut in [processor.offload(stage, routines, name='stage') for stage in stages[:jobs]]]
+        return perf_counter() - start
+    finally:
+        processor.quit()
+
+
+def main(count=200000, jobs=8, processes=None):
+    processes = processes or os.cpu_count()
+    routines = routine_totals(synthetic_routines(count))
+    start = perf_counter()
+    packed = pack(routines)
+    unpack(packed)
+    print(f'{count} routines, {jobs} jobs, {os.cpu_count()} cores')
+    print(f'{"pack + unpack":>20}: {(perf_counter() - start) * 1000:8.1f} ms ({packed.kind}, '
+          f'{packed.nbytes / 2 ** 20:.1f} MiB)')
+    print(f'{"in process":>20}: {run(routines, jobs, 0) * 1000:8.1f} ms')
+    print(f'{f"{processes} processes":>20}: {run(routines, jobs, processes) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# Being at the repository root, this puts the root on sys.path, so the tests import the package as `src` also when
+# run as plain `pytest` instead of `python -m pytest`.
@@ -1,3 +1,15 @@
+# -*- coding: utf-8 -*-
+import sys
+from time import perf_counter
+
+started_at = perf_counter()
+
+if len(sys.argv) > 1 and sys.argv[1] != '--profile-startup':
+    from src.cli import main as cli_main
+
+    sys.exit(cli_main(sys.argv[1:]))
+
 from src.ui import main
+imported_at = perf_counter()
 
-main()
+main(startup_times=(started_at, imported_at) if '--profile-startup' in sys.argv[1:] else None)
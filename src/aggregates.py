@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+from functools import partial
+
+import pandas as pd
+from sqlalchemy import select, and_
+
+from .analytics import load_routines, gymnast_stats, league_table
+from .mapping import to_model_frames
+from .models import Team, Standoff, Routine, LeagueTableRow, GymnastEventStat
+
+__all__ = [
+    'rebuild_aggregates',
+    'refresh_aggregates',
+    'refresh_aggregates_for',
+    'get_league_table',
+    'get_gymnast_stats',
+    'get_event_leaders',
+]
+
+
+def rebuild_aggregates(db, *, top_n=3, processor=None):
+    """A function to recompute all materialised aggregate tables from the raw routines.
+
+    :param db: the database to work on
+    :param top_n: how many of the best routines per team and event count
+    :param processor: a ConcurrentProcessor to compute the aggregates side by side on, see `_compute`
+    """
+    routines = load_routines(db)
+    stats, table = _compute(routines, routines, top_n, processor)
+    with db.get_session() as session:
+        _replace(session, GymnastEventStat, None, stats)
+        _replace(session, LeagueTableRow, None, table)
+    db.logger.info(f'Rebuilt aggregates out of {len(routines)} routines')
+
+
+def refresh_aggregates(db, *, standoff_ids=(), gymnast_ids=(), top_n=3, processor=None):
+    """A function to recompute the aggregates affected by new or changed standoffs and routines.
+
+    Only the stats of the affected gymnasts and the tables of the leagues and seasons of the affected standoffs are
+    recomputed.
+
+    :param db: the database to work on
+    :param standoff_ids: ids of the new or changed standoffs
+    :param gymnast_ids: ids of gymnasts with new or changed routines
+    :param top_n: how many of the best routines per team and event count
+    :param processor: a ConcurrentProcessor to compute the aggregates side by side on, see `_compute`
+    """
+    routines, standoffs, teams = (model.__table__ for model in (Routine, Standoff, Team))
+    standoff_ids, gymnast_ids = list(set(standoff_ids)), set(gymnast_ids)
+    with db.get_session() as session:
+        if standoff_ids:
+            gymnast_ids.update(row[0] for row in session.execute(
+                select([routines.c.gymnast_id]).where(routines.c.standoff_id.in_(standoff_ids)).distinct()))
+        affected = standoffs.c.id.in_(standoff_ids)
+        if gymnast_ids:
+            affected = affected | standoffs.c.id.in_(
+                select([routines.c.standoff_id]).where(routines.c.gymnast_id.in_(list(gymnast_ids))))
+        pairs = session.execute(select([teams.c.league_id, standoffs.c.season]).select_from(
+            standoffs.join(teams, standoffs.c.host_id == teams.c.id)).where(affected).distinct()).fetchall()
+    league_ids, seasons = {league_id for league_id, _ in pairs}, {season for _, season in pairs}
+    if not gymnast_ids and not pairs:
+        return
+
+    gymnast_routines = load_routines(db, gymnast_ids=gymnast_ids)
+    # holds every routine of each league in each season, so every one of these tables is recomputed as a whole
+    league_routines = load_routines(db, league_ids=league_ids, seasons=seasons)
+    stats, table = _compute(gymnast_routines, league_routines, top_n, processor)
+    with db.get_session() as session:
+        _replace(session, GymnastEventStat, {'gymnast_id': gymnast_ids}, stats)
+        _replace(session, LeagueTableRow, {'league_id': league_ids, 'season': seasons}, table)
+    db.logger.info(f'Refreshed aggregates of {len(gymnast_ids)} gymnasts and {len(pairs)} league seasons')
+
+
+def refresh_aggregates_for(db, dfs, *, top_n=3, processor=None):
+    """A function to refresh the aggregates affected by freshly loaded tables, see `load_dataframes`.
+
+    :param db: the database to work on
+    :param dfs: dict of the loaded DataFrames keyed by store or table name
+    :param top_n: how many of the best routines per team and event count
+    :param processor: a ConcurrentProcessor to compute the aggregates side by side on, see `_compute`
+    """
+    dfs = to_model_frames(dfs)
+    standoff_ids, gymnast_ids = set(), set()
+    if 'standoffs' in dfs and 'id' in dfs['standoffs']:
+        standoff_ids.update(dfs['standoffs']['id'].dropna().astype(int).tolist())
+    if 'routines' in dfs:
+        for column, ids in (('standoff_id', standoff_ids), ('gymnast_id', gymnast_ids)):
+            if column in dfs['routines']:
+                ids.update(dfs['routines'][column].dropna().astype(int).tolist())
+    refresh_aggregates(db, standoff_ids=standoff_ids, gymnast_ids=gymnast_ids, top_n=top_n, processor=processor)
+
+
+def _compute(stats_routines, table_routines, top_n, processor):
+    """Computes the gymnast stats and the league table, offloaded to the process pool of the processor if given."""
+    if processor is None:
+        return gymnast_stats(stats_routines), league_table(table_routines, top_n=top_n)
+    stats = processor.offload(gymnast_stats, stats_routines, name='gymnast_stats')
+    table = processor.offload(partial(league_table, top_n=top_n), table_routines, name='league_table')
+    return stats.result(), table.result()
+
+
+def _replace(session, model, scope, df):
+    """Replace all rows of a model, or only those whose scope columns are all in the given ids, with a DataFrame."""
+    table = model.__table__
+    if scope is None:
+        session.execute(table.delete())
+    else:
+        if not all(scope.values()):
+            return
+        session.execute(table.delete().where(and_(*(table.c[column].in_(list(ids)) for column, ids in scope.items()))))
+    columns = [column.name for column in table.columns]
+    if not df.empty:
+        records = df[columns].astype(object).where(pd.notnull(df[columns]), None).to_dict('records')
+        session.execute(table.insert(), records)
+
+
+def get_league_table(db, league_id, season):
+    """A function to read the materialised table of a league in a season.
+
+    :param db: the database to read from
+    :param league_id: the league
+    :param season: the season
+    :return: DataFrame ordered by rank
+    """
+    table = LeagueTableRow.__table__
+    return _read(db, table.select().where((table.c.league_id == league_id) & (table.c.season == season))
+                 .order_by(table.c.rank))
+
+
+def get_gymnast_stats(db, gymnast_id):
+    """A function to read the materialised per event stats of a gymnast.
+
+    :param db: the database to read from
+    :param gymnast_id: the gymnast
+    :return: DataFrame with one row per season and event
+    """
+    table = GymnastEventStat.__table__
+    return _read(db, table.select().where(table.c.gymnast_id == gymnast_id).order_by(table.c.season))
+
+
+def get_event_leaders(db, event, season, *, limit=10):
+    """A function to read the gymnasts with the best routines on an event in a season.
+
+    :param db: the database to read from
+    :param event: the Routine.Event
+    :param season: the season
+    :param limit: how many gymnasts to return
+    :return: DataFrame ordered by best routine
+    """
+    table = GymnastEventStat.__table__
+    return _read(db, table.select().where((table.c.event == event) & (table.c.season == season))
+                 .order_by(table.c.best.desc()).limit(limit))
+
+
+def _read(db, query):
+    with db.get_session() as session:
+        result = session.execute(query)
+        return pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
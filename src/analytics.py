@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from .models import Team, Gymnast, Standoff, Routine
+
+__all__ = [
+    'load_routines',
+    'routine_totals',
+    'team_event_scores',
+    'standoff_scores',
+    'gymnast_stats',
+    'league_table',
+]
+
+
+def load_routines(db, *, start=None, end=None, gymnast_ids=None, league_ids=None, seasons=None):
+    """A function to load all routines of a season into one columnar DataFrame.
+
+    :param db: the database to load from
+    :param start: the first day to load, inclusive
+    :param end: the last day to load, inclusive
+    :param gymnast_ids: only load the routines of these gymnasts
+    :param league_ids: only load the routines of standoffs in these leagues
+    :param seasons: only load the routines of standoffs in these seasons
+    :return: DataFrame with one row per routine, including its gymnast, team, standoff, season and the league of the
+             team of the gymnast as well as the one of the standoff, i.e. of its host
+    """
+    routines, gymnasts, standoffs, teams = (model.__table__ for model in (Routine, Gymnast, Standoff, Team))
+    hosts = teams.alias('hosts')
+    query = select([
+        routines.c.id, routines.c.E, routines.c.D, routines.c.event, routines.c.gymnast_id, routines.c.standoff_id,
+        gymnasts.c.team_id, teams.c.league_id, standoffs.c.timestamp, standoffs.c.season, standoffs.c.host_id,
+        standoffs.c.guest_id, hosts.c.league_id.label('standoff_league_id'),
+    ]).select_from(
+        routines.join(gymnasts, routines.c.gymnast_id == gymnasts.c.id)
+                .join(teams, gymnasts.c.team_id == teams.c.id)
+                .join(standoffs, routines.c.standoff_id == standoffs.c.id)
+                .join(hosts, standoffs.c.host_id == hosts.c.id)
+    )
+    if start is not None:
+        query = query.where(standoffs.c.timestamp >= start)
+    if end is not None:
+        query = query.where(standoffs.c.timestamp <= end)
+    if gymnast_ids is not None:
+        query = query.where(routines.c.gymnast_id.in_(list(gymnast_ids)))
+    if league_ids is not None:
+        query = query.where(hosts.c.league_id.in_(list(league_ids)))
+    if seasons is not None:
+        query = query.where(standoffs.c.season.in_(list(seasons)))
+    with db.get_session() as session:
+        result = session.execute(query)
+        df = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+    df['event'] = pd.Categorical(df['event'].map(lambda event: event.name),
+                                 categories=[event.name for event in Routine.Event])
+    return routine_totals(df)
+
+
+def routine_totals(routines):
+    """A function to add the total score of every routine, i.e. 10 + D - E.
+
+    :param routines: DataFrame with the columns D and E
+    :return: the DataFrame with an added total column
+    """
+    routines['total'] = 10 + routines['D'].to_numpy(dtype=np.float64) - routines['E'].to_numpy(dtype=np.float64)
+    return routines
+
+
+def team_event_scores(routines, *, top_n=3):
+    """A function to compute the score of every team on every event of a standoff, counting only its best routines.
+
+    :param routines: DataFrame as returned by `load_routines`
+    :param top_n: how many of the best routines per team and event count
+    :return: DataFrame with the columns standoff_id, team_id, event and score
+    """
+    best = routines.sort_values('total', ascending=False).groupby(['standoff_id', 'team_id', 'event'],
+                                                                  observed=True, sort=False).head(top_n)
+    return best.groupby(['standoff_id', 'team_id', 'event'], observed=True)['total'].sum() \
+               .rename('score').reset_index()
+
+
+def standoff_scores(routines, *, top_n=3):
+    """A function to compute the score of both teams of every standoff.
+
+    :param routines: DataFrame as returned by `load_routines`
+    :param top_n: how many of the best routines per team and event count
+    :return: DataFrame with the columns standoff_id, league_id, season, host_id, guest_id, host_score and guest_score
+    """
+    scores = team_event_scores(routines, top_n=top_n).groupby(['standoff_id', 'team_id'])['score'].sum()
+    standoffs = routines[['standoff_id', 'standoff_league_id', 'season', 'host_id', 'guest_id']] \
+        .drop_duplicates('standoff_id').rename(columns={'standoff_league_id': 'league_id'})
+    index = pd.MultiIndex.from_arrays
+    standoffs['host_score'] = scores.reindex(index([standoffs['standoff_id'], standoffs['host_id']])) \
+                                    .fillna(0).to_numpy()
+    standoffs['guest_score'] = scores.reindex(index([standoffs['standoff_id'], standoffs['guest_id']])) \
+                                     .fillna(0).to_numpy()
+    return standoffs.reset_index(drop=True)
+
+
+def gymnast_stats(routines):
+    """A function to compute average, best and amount of routines of every gymnast on every event of a season.
+
+    :param routines: DataFrame as returned by `load_routines`
+    :return: DataFrame with the columns gymnast_id, season, team_id, event, average, best and routines
+    """
+    return routines.groupby(['gymnast_id', 'season', 'team_id', 'event'], observed=True)['total'] \
+                   .agg(average='mean', best='max', routines='count').reset_index()
+
+
+def league_table(routines, *, top_n=3, win_points=2, draw_points=1):
+    """A function to compute the league tables of every season out of all standoffs.
+
+    :param routines: DataFrame as returned by `load_routines`
+    :param top_n: how many of the best routines per team and event count
+    :param win_points: points for a won standoff
+    :param draw_points: points for a drawn standoff
+    :return: DataFrame with one row per team, league and season, ordered by league, season and rank
+    """
+    standoffs = standoff_scores(routines, top_n=top_n)
+    host_diff = np.sign(standoffs['host_score'].to_numpy() - standoffs['guest_score'].to_numpy())
+    sides = pd.DataFrame({
+        'league_id': np.tile(standoffs['league_id'].to_numpy(), 2),
+        'season': np.tile(standoffs['season'].to_numpy(), 2),
+        'team_id': np.concatenate([standoffs['host_id'].to_numpy(), standoffs['guest_id'].to_numpy()]),
+        'result': np.concatenate([host_diff, -host_diff]),
+        'score_for': np.concatenate([standoffs['host_score'].to_numpy(), standoffs['guest_score'].to_numpy()]),
+        'score_against': np.concatenate([standoffs['guest_score'].to_numpy(), standoffs['host_score'].to_numpy()]),
+    })
+    sides['wins'] = (sides['result'] > 0).astype(np.int64)
+    sides['draws'] = (sides['result'] == 0).astype(np.int64)
+    sides['losses'] = (sides['result'] < 0).astype(np.int64)
+    table = sides.groupby(['league_id', 'season', 'team_id'])[['wins', 'draws', 'losses', 'score_for',
+                                                               'score_against']].sum()
+    table['standoffs'] = table['wins'] + table['draws'] + table['losses']
+    table['points'] = table['wins'] * win_points + table['draws'] * draw_points
+    table = table.reset_index().sort_values(['league_id', 'season', 'points', 'score_for'],
+                                            ascending=[True, True, False, False])
+    table['rank'] = table.groupby(['league_id', 'season']).cumcount() + 1
+    return table.reset_index(drop=True)
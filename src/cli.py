@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import logging
+import os
+import sys
+from time import perf_counter
+
+__all__ = [
+    'main',
+    'COMMANDS',
+]
+
+
+COMMANDS = ('sync', 'export', 'stats')
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_INTERRUPTED = 130
+
+project_dir = os.path.dirname(os.path.dirname(__file__))
+
+
+def emit(event, **fields):
+    """Writes one json progress line to stdout."""
+    print(json.dumps(dict(event=event, **fields), default=str), flush=True)
+
+
+def open_db(args):
+    from .models import STBDB
+    return STBDB(descriptor=STBDB.sqlite_descriptor(args.db))
+
+
+def sync(args):
+    from .driver import STBDriver, STBDriverPool, extract_index_db, sync_index_db, index_db_cache_key
+    from .lib.cache import DiskCache
+    from .lib.concurrent import ConcurrentProcessor
+    from .processing import STB_DB_CLEANUP_MAP
+    from .mapping import to_model_frames
+    from .loading import load_dataframes
+    from .aggregates import refresh_aggregates_for
+    import pandas as pd
+
+    db = open_db(args)
+    started_at = perf_counter()
+    if args.browsers > 1:
+        driver = STBDriverPool(size=args.browsers, path=args.driver, max_workers=args.workers)
+    else:
+        driver = STBDriver(path=args.driver, headless=True, max_workers=args.workers)
+    emit('driver_started', seconds=perf_counter() - started_at)
+
+    try:
+        def progress(done, total, rows):
+            emit('progress', done=done, total=total, rows=rows, seconds=perf_counter() - started_at)
+
+        if args.incremental:
+            tasks = [sync_index_db(url, args.tables, db) for url in args.urls]
+        else:
+            tasks = [extract_index_db(url, args.tables, mode=args.mode, progress=progress) for url in args.urls]
+            if args.cache_dir:
+                # a repeated extraction within the ttl is read from disk, the browser is still started for the others
+                cache = DiskCache(args.cache_dir, ttl=args.cache_ttl)
+                tasks = [cache.cached(task, key=index_db_cache_key(url, args.tables, args.mode))
+                         for url, task in zip(args.urls, tasks)]
+        results = [fut.result() for fut in [driver.do(task) for task in tasks]]
+        sync_marks = {}
+        if args.incremental:
+            for result in results:
+                sync_marks.update(result.marks)
+            results = [result.frames for result in results]
+    finally:
+        driver.quit()
+        if args.metrics:
+            driver.metrics.write(args.metrics)
+
+    dfs = {table: pd.concat([result[table] for result in results], ignore_index=True) for table in args.tables}
+    rows = sum(len(df) for df in dfs.values())
+    extracted_at = perf_counter()
+    emit('extracted', rows=rows, seconds=extracted_at - started_at,
+         rows_per_second=rows / max(extracted_at - started_at, 1e-9))
+
+    processor = ConcurrentProcessor(max_workers=len(dfs) or 1, process_workers=args.processes)
+    try:
+        futs = {key: processor.offload(STB_DB_CLEANUP_MAP[key], df, name=f'cleanup:{key}') for key, df in dfs.items()}
+        models = to_model_frames({key: fut.result() for key, fut in futs.items()})
+        loaded = load_dataframes(db, models, sync_marks=sync_marks)
+        refresh_aggregates_for(db, models, processor=processor)
+    finally:
+        processor.quit()
+    emit('loaded', tables=loaded, seconds=perf_counter() - extracted_at)
+    emit('done', rows=rows, seconds=perf_counter() - started_at)
+
+
+def export(args):
+    from .exporting import stream_tables, export_tables, count_rows
+
+    db = open_db(args)
+    started_at = perf_counter()
+    # the tables are fetched in chunks while they are written, instead of being read into memory up front
+    dfs = stream_tables(db, args.tables)
+    path = os.path.join(args.dir, 'stb.xlsx') if args.format == 'xlsx' else args.dir
+    paths = export_tables(dfs, path, args.format)
+    rows = sum(count_rows(db, list(dfs)).values())
+    emit('done', files=paths, rows=rows, seconds=perf_counter() - started_at)
+
+
+def stats(args):
+    from .aggregates import rebuild_aggregates
+    from .exporting import count_rows
+
+    db = open_db(args)
+    started_at = perf_counter()
+    if args.rebuild:
+        rebuild_aggregates(db)
+        emit('rebuilt', seconds=perf_counter() - started_at)
+    emit('done', rows=count_rows(db))
+
+
+def build_parser():
+    from .exporting import EXPORT_DIR
+    from .stores import STB_DB_STORES
+
+    parser = argparse.ArgumentParser(prog='STB_Liga_export', description='Headless STB league data export.')
+    parser.add_argument('--db', default=os.path.join(project_dir, 'data/stb.sqlite'), help='sqlite database file')
+    parser.add_argument('--verbose', '-v', action='store_true', help='log debug output to stderr')
+    commands = parser.add_subparsers(dest='command')
+
+    sync_parser = commands.add_parser('sync', help='extract the league data and load it into the database')
+    sync_parser.add_argument('--url', dest='urls', action='append', help='page to extract, can be repeated')
+    sync_parser.add_argument('--tables', nargs='+', default=list(STB_DB_STORES), help='indexdb tables to extract')
+    sync_parser.add_argument('--mode', choices=('bulk', 'async', 'poll'), default='bulk', help='extraction mode')
+    sync_parser.add_argument('--incremental', action='store_true', help='only transfer new and changed rows')
+    sync_parser.add_argument('--cache-dir', help='directory to cache extracted pages in, not used by --incremental')
+    sync_parser.add_argument('--cache-ttl', type=int, default=24 * 60 * 60,
+                             help='seconds a cached extraction is used for')
+    sync_parser.add_argument('--driver', default=os.path.join(project_dir, 'drivers/geckodriver'),
+                             help='path of the geckodriver executable')
+    sync_parser.add_argument('--workers', type=int, default=8, help='worker threads of the processor')
+    sync_parser.add_argument('--browsers', type=int, default=1, help='browser instances to extract with')
+    sync_parser.add_argument('--processes', type=int, default=0,
+                             help='worker processes to run cleanup and aggregation on, 0 runs them in process')
+    sync_parser.add_argument('--metrics', help='file to write the task metrics to, .json or prometheus text')
+    sync_parser.set_defaults(func=sync)
+
+    export_parser = commands.add_parser('export', help='export the database tables')
+    export_parser.add_argument('--dir', default=EXPORT_DIR, help='directory to export to')
+    export_parser.add_argument('--tables', nargs='+', help='tables to export, defaults to all but the sync bookkeeping')
+    export_parser.add_argument('--format', choices=('csv', 'parquet', 'feather', 'xlsx'), default='csv',
+                               help='file format, xlsx writes one workbook with a sheet per table')
+    export_parser.set_defaults(func=export)
+
+    stats_parser = commands.add_parser('stats', help='show the database contents')
+    stats_parser.add_argument('--rebuild', action='store_true', help='rebuild the aggregate tables first')
+    stats_parser.set_defaults(func=stats)
+    return parser
+
+
+def main(argv=None):
+    """Runs a command line command.
+
+    :param argv: the arguments, defaults to sys.argv
+    :return: the exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return EXIT_FAILURE
+    if args.command == 'sync' and not args.urls:
+        from .driver import STB_HOME_ADDRESS
+        args.urls = [STB_HOME_ADDRESS]
+
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        emit('interrupted')
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        logging.getLogger('cli').exception('Command failed')
+        emit('failed', error=f'{e.__class__.__name__}: {e}')
+        return EXIT_FAILURE
+    return EXIT_OK
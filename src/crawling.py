@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import logging
+from concurrent.futures import Future, wait
+from threading import BoundedSemaphore, Lock
+from time import monotonic, sleep
+from typing import NamedTuple, Any
+from urllib.parse import urlsplit
+
+__all__ = [
+    'CrawlTarget',
+    'RateLimiter',
+    'CrawlPlanner',
+    'plan_crawl',
+]
+
+
+CrawlTarget = NamedTuple('CrawlTarget', [('url', str), ('season', Any), ('league', Any), ('priority', int)])
+
+
+def plan_crawl(saison, tabelle, url_template, *, season_key='id', league_key='id', tabelle_season_key='saison',
+               current_season=None):
+    """A function to enumerate the league/season pages to crawl out of the saison and tabelle stores.
+
+    Leagues are taken from the tabelle store, together with their season if it has one, otherwise every league is
+    planned for every season. The pages are deduplicated by url, the current season comes first, older seasons
+    after it, newest first.
+
+    :param saison: the cleaned saison DataFrame
+    :param tabelle: the cleaned tabelle DataFrame
+    :param url_template: format string of a page url, getting season and league, e.g. '...?saison={season}&...'
+    :param season_key: column of saison holding the season id
+    :param league_key: column of tabelle holding the league id
+    :param tabelle_season_key: column of tabelle holding the season id, if it has one
+    :param current_season: the season to crawl first, defaults to the newest one
+    :return: list of CrawlTargets ordered by priority
+    """
+    seasons = sorted(saison[season_key].dropna().unique().tolist(), reverse=True)
+    if tabelle_season_key in tabelle:
+        pairs = tabelle[[tabelle_season_key, league_key]].dropna().drop_duplicates().itertuples(index=False)
+    else:
+        leagues = tabelle[league_key].dropna().unique().tolist()
+        pairs = ((season, league) for season in seasons for league in leagues)
+    if current_season is None and seasons:
+        current_season = seasons[0]
+
+    rank = {season: i + 1 for i, season in enumerate(season for season in seasons if season != current_season)}
+    targets = {}
+    for season, league in pairs:
+        url = url_template.format(season=season, league=league)
+        if url not in targets:
+            priority = 0 if season == current_season else rank.get(season, len(rank) + 1)
+            targets[url] = CrawlTarget(url, season, league, priority)
+    return sorted(targets.values(), key=lambda target: target.priority)
+
+
+class RateLimiter:
+    """A token bucket per host, allowing `rate` requests per second with bursts of up to `burst` requests."""
+    def __init__(self, rate, *, burst=1):
+        self._rate = rate
+        self._burst = burst
+        self._lock = Lock()
+        self._buckets = {}
+
+    def acquire(self, url):
+        """A method to block until a request to the host of the url is allowed.
+
+        :param url: the url about to be requested
+        """
+        host = urlsplit(url).netloc
+        while True:
+            with self._lock:
+                tokens, updated_at = self._buckets.get(host, (self._burst, monotonic()))
+                now = monotonic()
+                tokens = min(self._burst, tokens + (now - updated_at) * self._rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait_for = (1 - tokens) / self._rate
+            sleep(wait_for)
+
+
+class CrawlPlanner:
+    """Runs crawl targets through a processor with bounded concurrency and a per host rate limit."""
+    def __init__(self, processor, *, max_concurrency=4, rate_per_host=1.0, burst=1):
+        self._logger = logging.getLogger(self.__class__.__qualname__)
+        self._processor = processor
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rate_per_host, burst=burst)
+
+    def run(self, targets, task_factory):
+        """A method to crawl the targets in order of priority.
+
+        :param targets: CrawlTargets, e.g. from `plan_crawl`
+        :param task_factory: callable creating the task of a target out of its url, e.g.
+                             `lambda url: extract_index_db(url, tables)`
+        :return: tuple of dicts mapping the targets to their results and to the exceptions of the failed ones
+        """
+        futures = {}
+        for target in sorted(targets, key=lambda target: target.priority):
+            self._slots.acquire()
+            try:
+                self._rate_limiter.acquire(target.url)
+                self._logger.debug(f'Crawling {target.url} (priority {target.priority})')
+                fut = self._processor.do(task_factory(target.url))
+            except Exception as e:
+                # the task never got submitted, so no done callback gives the slot back
+                self._slots.release()
+                fut = Future()
+                fut.set_exception(e)
+            else:
+                fut.add_done_callback(lambda _: self._slots.release())
+            futures[target] = fut
+        wait(futures.values())
+        results = {target: fut.result() for target, fut in futures.items() if fut.exception() is None}
+        errors = {target: fut.exception() for target, fut in futures.items() if fut.exception() is not None}
+        if errors:
+            self._logger.warning(f'{len(errors)} of {len(futures)} targets failed')
+        return results, errors
@@ -1,80 +1,606 @@
 # -*- coding: utf-8 -*-
 import json
-from time import sleep
+from functools import partial
+from time import sleep, monotonic
+from typing import NamedTuple, Dict, Tuple, List
 
 import pandas as pd
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException, TimeoutException
 
-from .lib.concurrent import make_task_factory
-from .lib.driver import Driver
+from .lib.concurrent import make_task_factory, RetryPolicy, CircuitBreaker
+from .lib.driver import Driver, DriverPool, AsyncDriver, document_ready, js_predicate
+from .lib.cache import DiskCache
+from .lib.fetcher import HttpFetcher
+from .lib.fastjson import loads, frame_from_json
 
 __all__ = [
     'STBDriver',
+    'STBDriverPool',
+    'STBFetcher',
+    'STBAsyncDriver',
+    'STB_HOME_ADDRESS',
+    'STB_DB_READY',
+    'STB_RETRY_POLICY',
     'extract_index_db',
+    'extract_index_db_async',
+    'index_db_cache_key',
+    'sync_index_db',
+    'SyncResult',
+    'stream_index_db',
+    'iter_index_db',
+    'fetch_index_db',
+    'discover_data_endpoints',
+    'endpoint_revalidation',
 ]
 
 
+STB_HOME_ADDRESS = 'https://kutu.stb-liga.de'
+
+
 class STBDriver(Driver):
     def __init__(self, *args, **kwargs):
-        kwargs['home_address'] = 'https://kutu.stb-liga.de'
+        kwargs['home_address'] = STB_HOME_ADDRESS
         super(STBDriver, self).__init__(*args, **kwargs)
 
 
-@make_task_factory
-def extract_index_db(driver, url, tables, *, wait_timer=5):
+class STBDriverPool(DriverPool):
+    def __init__(self, *args, **kwargs):
+        kwargs['home_address'] = STB_HOME_ADDRESS
+        super(STBDriverPool, self).__init__(*args, **kwargs)
+
+
+class STBAsyncDriver(AsyncDriver):
+    def __init__(self, *args, **kwargs):
+        kwargs['home_address'] = STB_HOME_ADDRESS
+        super(STBAsyncDriver, self).__init__(*args, **kwargs)
+
+
+class STBFetcher(HttpFetcher):
+    def __init__(self, *args, **kwargs):
+        kwargs['home_address'] = STB_HOME_ADDRESS
+        super(STBFetcher, self).__init__(*args, **kwargs)
+
+
+STB_DB_READY = (document_ready(), js_predicate('DB.db'))
+
+# shared by all scrape tasks, so the breaker stops every one of them once the site keeps failing
+STB_RETRY_POLICY = RetryPolicy(max_attempts=4, base_delay=2, max_delay=30, deadline=10 * 60,
+                               retry_on=(WebDriverException,),
+                               breaker=CircuitBreaker(failure_threshold=6, reset_timeout=5 * 60))
+
+_POLL_JS_SNIPPET = """
+var tbl = "{}";
+var templist = document.createElement('templist-' + tbl);
+document.body.appendChild(templist);
+CONSOLE.log("------------------------------");
+CONSOLE.log("> Started extraction of " + tbl);
+var trans = DB.db.transaction([tbl], "readonly");
+var store = trans.objectStore(tbl);
+var range = IDBKeyRange.lowerBound(0);
+var cursorRequest = store.openCursor(range);
+
+cursorRequest.onsuccess = function(evt) {{
+    if(evt.target.result) {{
+        var s = document.createTextNode(JSON.stringify(evt.target.result.value)+'<->');
+        templist.appendChild(s);
+        evt.target.result.continue();
+    }}
+    else {{
+        var s = document.createTextNode('[DONE]');
+        templist.appendChild(s);
+    }}
+}};
+
+CONSOLE.log("> Done with " + tbl);
+"""
+
+_TO_COLUMNS_JS = """
+var toColumns = function(rows) {
+    var columns = {};
+    rows.forEach(function(row, i) {
+        for(var key in row) {
+            if(!(key in columns)) {
+                columns[key] = new Array(rows.length).fill(null);
+            }
+            columns[key][i] = row[key];
+        }
+    });
+    return columns;
+};
+"""
+
+_ASYNC_JS_SNIPPET = _TO_COLUMNS_JS + """
+var tbl = arguments[0];
+var done = arguments[arguments.length - 1];
+try {
+    var store = DB.db.transaction([tbl], "readonly").objectStore(tbl);
+    var rows = [];
+    var cursorRequest = store.openCursor(IDBKeyRange.lowerBound(0));
+    cursorRequest.onsuccess = function(evt) {
+        var cursor = evt.target.result;
+        if(cursor) {
+            rows.push(cursor.value);
+            cursor.continue();
+        }
+        else {
+            done({rows: JSON.stringify(toColumns(rows))});
+        }
+    };
+    cursorRequest.onerror = function(evt) {
+        done({error: String(evt.target.error)});
+    };
+} catch(e) {
+    done({error: String(e)});
+}
+"""
+
+
+_BULK_JS_SNIPPET = _TO_COLUMNS_JS + """
+var tbls = arguments[0];
+var done = arguments[arguments.length - 1];
+try {
+    var trans = DB.db.transaction(tbls, "readonly");
+    var result = {};
+    var pending = tbls.length;
+    var finish = function(tbl, rows) {
+        result[tbl] = JSON.stringify(toColumns(rows));
+        pending -= 1;
+        if(pending === 0) {
+            done({tables: result});
+        }
+    };
+    var fail = function(evt) {
+        done({error: String(evt.target.error)});
+    };
+    if(pending === 0) {
+        done({tables: result});
+    }
+    tbls.forEach(function(tbl) {
+        var store = trans.objectStore(tbl);
+        var range = IDBKeyRange.lowerBound(0);
+        if(typeof store.getAll === 'function') {
+            var request = store.getAll(range);
+            request.onsuccess = function(evt) {
+                finish(tbl, evt.target.result);
+            };
+            request.onerror = fail;
+        }
+        else {
+            var rows = [];
+            var cursorRequest = store.openCursor(range);
+            cursorRequest.onsuccess = function(evt) {
+                var cursor = evt.target.result;
+                if(cursor) {
+                    rows.push(cursor.value);
+                    cursor.continue();
+                }
+                else {
+                    finish(tbl, rows);
+                }
+            };
+            cursorRequest.onerror = fail;
+        }
+    });
+} catch(e) {
+    done({error: String(e)});
+}
+"""
+
+
+_SYNC_JS_SNIPPET = _TO_COLUMNS_JS + """
+var tbl = arguments[0];
+var known = arguments[1];
+var chunkSize = arguments[2];
+var done = arguments[arguments.length - 1];
+var fnv = function(hash, text) {
+    for(var i = 0; i < text.length; i++) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 16777619) >>> 0;
+    }
+    return hash;
+};
+var newChunk = function(first, digest) {
+    return {first: first, last: first, hash: 2166136261, known: digest, rows: [], count: 0};
+};
+try {
+    var store = DB.db.transaction([tbl], "readonly").objectStore(tbl);
+    var mark = known.length ? known[known.length - 1].last : null;
+    var chunks = known.map(function(c) {
+        var chunk = newChunk(c.first, c.digest);
+        chunk.last = c.last;
+        return chunk;
+    });
+    var index = 0;
+    // new keys are appended to the last chunk until it is full
+    var current = chunks.length ? chunks[chunks.length - 1] : null;
+    var cursorRequest = store.openCursor();
+    cursorRequest.onsuccess = function(evt) {
+        var cursor = evt.target.result;
+        if(cursor) {
+            var key = cursor.primaryKey;
+            var chunk;
+            if(mark !== null && indexedDB.cmp(key, mark) <= 0) {
+                while(index + 1 < chunks.length && indexedDB.cmp(key, chunks[index + 1].first) >= 0) {
+                    index += 1;
+                }
+                chunk = chunks[index];
+            }
+            else {
+                if(current === null || current.count >= chunkSize) {
+                    current = newChunk(key, null);
+                    chunks.push(current);
+                }
+                current.last = key;
+                chunk = current;
+            }
+            chunk.hash = fnv(chunk.hash, JSON.stringify(cursor.value));
+            chunk.rows.push(cursor.value);
+            chunk.count += 1;
+            cursor.continue();
+        }
+        else {
+            // the rows of all changed chunks go back as one columnar document, the marks separately
+            var rows = [];
+            var marks = chunks.map(function(c) {
+                var digest = c.count + ':' + c.hash.toString(16);
+                var changed = digest !== c.known;
+                if(changed) {
+                    rows = rows.concat(c.rows);
+                }
+                return {first: c.first, last: c.last, digest: digest, changed: changed};
+            });
+            done({chunks: JSON.stringify(marks), rows: JSON.stringify(toColumns(rows))});
+        }
+    };
+    cursorRequest.onerror = function(evt) {
+        done({error: String(evt.target.error)});
+    };
+} catch(e) {
+    done({error: String(e)});
+}
+"""
+
+
+_BATCH_JS_SNIPPET = _TO_COLUMNS_JS + """
+var tbl = arguments[0];
+var after = arguments[1];
+var batchSize = arguments[2];
+var done = arguments[arguments.length - 1];
+try {
+    var store = DB.db.transaction([tbl], "readonly").objectStore(tbl);
+    var range = after === null ? IDBKeyRange.lowerBound(0) : IDBKeyRange.lowerBound(after, true);
+    var rows = [];
+    var last = null;
+    var cursorRequest = store.openCursor(range);
+    cursorRequest.onsuccess = function(evt) {
+        var cursor = evt.target.result;
+        if(cursor && rows.length < batchSize) {
+            rows.push(cursor.value);
+            last = cursor.primaryKey;
+            cursor.continue();
+        }
+        else {
+            done({rows: JSON.stringify(toColumns(rows)), last: last, more: !!cursor});
+        }
+    };
+    cursorRequest.onerror = function(evt) {
+        done({error: String(evt.target.error)});
+    };
+} catch(e) {
+    done({error: String(e)});
+}
+"""
+
+
+@make_task_factory(retry=STB_RETRY_POLICY)
+def extract_index_db(driver, url, tables, *, wait_timer=5, mode='bulk', script_timeout=60, ready=STB_DB_READY,
+                     progress=None):
     """A method to extract the indexdb of a page, that waits for the js to load the data before extracting.
 
     :param driver: driver to operate on
     :param url: the url to get the data from
     :param tables: the tables to extract
     :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
+    :param mode: 'bulk' to get all tables back from one transaction in a single payload,
+                 'async' to get each table back as soon as its cursor is done,
+                 'poll' to scrape each table from the DOM
+    :param script_timeout: how long a single extraction script, or polling a table in 'poll' mode, may take
+    :param progress: callable taking the amount of tables done, the total amount and the rows extracted so far
     :return: dict with extracted values
     """
-    js_snippet = """
-    var tbl = "{}";
-    var templist = document.createElement('templist-' + tbl);
-    document.body.appendChild(templist);
-    CONSOLE.log("------------------------------");
-    CONSOLE.log("> Started extraction of " + tbl);
-    var trans = DB.db.transaction([tbl], "readonly");
-    var store = trans.objectStore(tbl);
-    var range = IDBKeyRange.lowerBound(0);
-    var cursorRequest = store.openCursor(range);
-    
-    cursorRequest.onsuccess = function(evt) {{
-        if(evt.target.result) {{
-            var s = document.createTextNode(JSON.stringify(evt.target.result.value)+'<->');
-            templist.appendChild(s);
-            evt.target.result.continue();
-        }}
-        else {{
-            var s = document.createTextNode('[DONE]');
-            templist.appendChild(s);
-        }}
-    }};
-    
-    CONSOLE.log("> Done with " + tbl);
+    extractors = {
+        'bulk': _extract_tables_bulk,
+        'async': _extract_tables_async,
+        'poll': partial(_extract_tables_polling, timeout=script_timeout),
+    }
+    assert mode in extractors, f"Unknown extraction mode '{mode}'."
+    progress = progress or (lambda *_: None)
+    ret = {}
+    with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready):
+        if mode != 'poll':
+            driver.set_script_timeout(script_timeout)
+        progress(0, len(tables), 0)
+        for table, df in extractors[mode](driver, tables):
+            ret[table] = df
+            driver._logger.debug(f"{table} ==> {ret[table]}")
+            progress(len(ret), len(tables), sum(len(df) for df in ret.values()))
+    return ret
+
+
+def index_db_cache_key(url, tables, mode='bulk'):
+    """A function to create the DiskCache key of an `extract_index_db` result, made of what decides its contents only.
+
+    :param url: the url the data is extracted from
+    :param tables: the tables extracted, in any order
+    :param mode: the extraction mode
+    :return: the cache key
+    """
+    return DiskCache.make_key('extract_index_db', url, sorted(tables), mode=mode)
+
+
+@make_task_factory
+async def extract_index_db_async(driver, url, tables, *, wait_timer=5, script_timeout=60, ready=STB_DB_READY):
+    """The AsyncDriver version of `extract_index_db` in 'bulk' mode, many of them run concurrently in one loop.
+
+    :param driver: the AsyncDriver to operate on
+    :param url: the url to get the data from
+    :param tables: the tables to extract
+    :param wait_timer: how long the driver should wait for at maximum
+    :param script_timeout: how long the extraction script may take
+    :param ready: conditions that have to be met before the page counts as loaded
+    :return: dict with extracted values
+    """
+    async with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready) as tab:
+        payload = await driver.execute_async(tab, _BULK_JS_SNIPPET, list(tables), timeout=script_timeout)
+    if 'error' in payload:
+        raise WebDriverException(f"Extraction of {', '.join(tables)} failed: {payload['error']}")
+    return {table: frame_from_json(columns) for table, columns in payload['tables'].items()}
+
+
+def _extract_tables_bulk(driver, tables):
+    """Read all tables from a single readonly transaction and get them back in one payload.
+
+    :param driver: driver to operate on
+    :param tables: the tables to extract
+    :return: generator of table names and DataFrames
+    """
+    payload = driver.execute_async_script(_BULK_JS_SNIPPET, list(tables))
+    if 'error' in payload:
+        raise WebDriverException(f"Extraction of {', '.join(tables)} failed: {payload['error']}")
+    for table, columns in payload['tables'].items():
+        yield table, frame_from_json(columns)
+
+
+def _extract_tables_async(driver, tables):
+    for table in tables:
+        yield table, _extract_table_async(driver, table)
+
+
+def _extract_tables_polling(driver, tables, *, timeout):
+    for table in tables:
+        yield table, _extract_table_polling(driver, table, timeout=timeout)
+
+
+def _extract_table_async(driver, table):
+    """Walk the cursor of a table inside an async script and get all rows back in one payload.
+
+    :param driver: driver to operate on
+    :param table: the table to extract
+    :return: the DataFrame
+    """
+    payload = driver.execute_async_script(_ASYNC_JS_SNIPPET, table)
+    if 'error' in payload:
+        raise WebDriverException(f"Extraction of {table} failed: {payload['error']}")
+    return frame_from_json(payload['rows'])
+
+
+def _extract_table_polling(driver, table, *, timeout):
+    """Walk the cursor of a table into a temporary DOM node and poll it until the cursor is done.
+
+    :param driver: driver to operate on
+    :param table: the table to extract
+    :param timeout: how long to poll at maximum
+    :return: the DataFrame
+    """
+    # start js snippet
+    driver.execute_script(_POLL_JS_SNIPPET.format(table))
+    templist_name = 'templist-' + table
+
+    # wait for the db cursor to reach the end
+    deadline = monotonic() + timeout
+    done = False
+    while not done:
+        if monotonic() > deadline:
+            raise TimeoutException(f'Extraction of {table} did not finish within {timeout}s')
+        try:
+            sleep(1)
+            if '[DONE]' in driver.find_element_by_tag_name(templist_name).text:
+                driver._logger.debug(f'Found templist <{templist_name}>')
+                done = True
+        except NoSuchElementException:
+            pass
+
+    # grad clear text data from the pages html
+    res = driver.find_element_by_tag_name(templist_name).text
+    return pd.DataFrame([json.loads(x) for x in res.split('<->')[:-1]])
+
+
+class SyncResult(NamedTuple):
+    """The rows an incremental sync transferred, and the chunk marks to store once they are loaded.
+
+    The marks are keyed by source page and store, see `STBDB.set_sync_chunks`, and handed to `load_dataframes` as
+    `sync_marks`, which commits them together with the rows.
+    """
+    frames: Dict[str, pd.DataFrame]
+    marks: Dict[Tuple[str, str], List[dict]]
+
+
+@make_task_factory(retry=STB_RETRY_POLICY)
+def sync_index_db(driver, url, tables, db, *, chunk_size=1000, full=False, wait_timer=5, script_timeout=60,
+                  ready=STB_DB_READY):
+    """A method to incrementally extract the indexdb of a page.
+
+    Each table is split into chunks of keys whose content hash is stored in the local database, together with the
+    highest key seen. On the next run only keys above that mark and chunks whose hash changed are transferred. The
+    new marks are only returned, nothing is stored before the rows are loaded, so a retry transfers the same rows.
+
+    :param driver: driver to operate on
+    :param url: the url to get the data from
+    :param tables: the tables to extract
+    :param db: the STBDB holding the chunk marks
+    :param chunk_size: how many keys a new chunk should span
+    :param full: drop the stored chunk marks and transfer everything
+    :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
+    :param script_timeout: how long a single table sync may take
+    :return: the SyncResult with the new and changed rows of each table
+    """
+    ret = SyncResult({}, {})
+    with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready):
+        driver.set_script_timeout(script_timeout)
+        for table in tables:
+            known = [] if full else db.get_sync_chunks(table, source=url)
+            payload = driver.execute_async_script(_SYNC_JS_SNIPPET, table, known, chunk_size)
+            if 'error' in payload:
+                raise WebDriverException(f"Sync of {table} failed: {payload['error']}")
+            chunks = loads(payload['chunks'])
+            ret.frames[table] = frame_from_json(payload['rows'])
+            ret.marks[url, table] = [{key: chunk[key] for key in ('first', 'last', 'digest')} for chunk in chunks]
+            changed = sum(chunk['changed'] for chunk in chunks)
+            driver._logger.debug(f"{table} ==> {changed} of {len(chunks)} chunks changed")
+    return ret
+
+
+def iter_index_db(driver, table, *, batch_size=5000):
+    """A generator to page through an indexdb table in fixed size batches.
+
+    Has to be used on a driver that is already pointed at the page, e.g. inside `open_new_tab`. Each batch is read in
+    its own short transaction, resuming after the last key of the previous batch, so neither the browser nor python
+    ever hold more than one batch.
+
+    :param driver: driver to operate on
+    :param table: the table to extract
+    :param batch_size: how many records a batch should hold at maximum
+    :return: generator of DataFrames
+    """
+    after = None
+    more = True
+    while more:
+        payload = driver.execute_async_script(_BATCH_JS_SNIPPET, table, after, batch_size)
+        if 'error' in payload:
+            raise WebDriverException(f"Extraction of {table} failed: {payload['error']}")
+        batch = frame_from_json(payload['rows'])
+        if len(batch):
+            yield batch
+        after = payload['last']
+        more = payload['more']
+
+
+@make_task_factory
+def stream_index_db(driver, url, tables, consumer, *, batch_size=5000, wait_timer=5, script_timeout=60,
+                    ready=STB_DB_READY):
+    """A method to extract the indexdb of a page batch by batch, handing every batch to a consumer as it arrives.
+
+    Not retried, a second attempt would hand the consumer the batches it already got once more.
+
+    :param driver: driver to operate on
+    :param url: the url to get the data from
+    :param tables: the tables to extract
+    :param consumer: callable taking the table name and a DataFrame batch, e.g. to append it to a database or file
+    :param batch_size: how many records a batch should hold at maximum
+    :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
+    :param script_timeout: how long a single batch may take
+    :return: dict with the amount of rows extracted per table
     """
     ret = {}
-    with driver.open_new_tab(url, wait_timer=wait_timer):
+    with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready):
+        driver.set_script_timeout(script_timeout)
         for table in tables:
-            # start js snippet
-            driver.execute_script(js_snippet.format(table))
-            templist_name = 'templist-' + table
-
-            # wait for the db cursor to reach the end
-            done = False
-            while not done:
-                try:
-                    sleep(1)
-                    if '[DONE]' in driver.find_element_by_tag_name(templist_name).text:
-                        driver.logger.debug(f'Found templist <{templist_name}>')
-                        done = True
-                except NoSuchElementException:
-                    pass
-
-            # grad clear text data from the pages html
-            res = driver.find_element_by_tag_name(templist_name).text
-            ret[table] = pd.DataFrame([json.loads(x) for x in res.split('<->')[:-1]])
-            driver.logger.debug(f"{table} ==> {ret[table]}")
+            ret[table] = 0
+            for batch in iter_index_db(driver, table, batch_size=batch_size):
+                consumer(table, batch)
+                ret[table] += len(batch)
+            driver._logger.debug(f"{table} ==> {ret[table]} rows streamed")
+    return ret
+
+
+@make_task_factory(retry=STB_RETRY_POLICY)
+def discover_data_endpoints(driver, url, *, wait_timer=5, ready=STB_DB_READY):
+    """A method to list the xhr/fetch requests a page made while loading, i.e. the candidates for `fetch_index_db`.
+
+    :param driver: driver to operate on
+    :param url: the url to inspect
+    :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
+    :return: list of requested urls
+    """
+    js_snippet = """
+    return performance.getEntriesByType('resource')
+        .filter(function(entry) { return ['xmlhttprequest', 'fetch'].indexOf(entry.initiatorType) >= 0; })
+        .map(function(entry) { return entry.name; });
+    """
+    with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready):
+        return driver.execute_script(js_snippet)
+
+
+@make_task_factory
+def fetch_index_db(fetcher, tables, endpoints, *, fallback=None, fallback_url=None):
+    """A method to get the data that would populate the indexdb directly over http, bypassing the browser.
+
+    Tables without an endpoint or whose request fails are extracted through the fallback driver instead, if given.
+
+    :param fetcher: the HttpFetcher to operate on
+    :param tables: the tables to get
+    :param endpoints: dict mapping each table to the url serving its records
+    :param fallback: driver to run `extract_index_db` on for the remaining tables
+    :param fallback_url: the url to extract the remaining tables from
+    :return: dict with extracted values
+    """
+    ret = {}
+    missing = []
+    for table in tables:
+        if table not in endpoints:
+            missing.append(table)
+            continue
+        try:
+            ret[table] = pd.DataFrame(_records_from_payload(fetcher.get_json(endpoints[table]), table))
+            fetcher._logger.debug(f"{table} ==> {len(ret[table])} rows fetched")
+        except Exception as e:
+            if fallback is None:
+                raise
+            fetcher._logger.warning(f"Fetching {table} failed ({e}), falling back to the browser")
+            missing.append(table)
+    if missing:
+        assert fallback is not None, f"No endpoint for {', '.join(missing)} and no fallback driver given."
+        ret.update(extract_index_db(fallback_url or fallback.current_url, missing)(fallback))
     return ret
+
+
+def _records_from_payload(payload, table):
+    """Find the list of records in a decoded response, either the payload itself or the value under the table name."""
+    if isinstance(payload, dict):
+        payload = payload.get(table, payload.get('data', payload))
+    if isinstance(payload, dict):
+        payload = list(payload.values())
+    return payload
+
+
+def endpoint_revalidation(endpoints):
+    """A function to create the validator and revalidate hooks for caching `fetch_index_db` in a DiskCache.
+
+    A stale entry is reused as long as none of the endpoints reports a new ETag/Last-Modified.
+
+    :param endpoints: dict mapping each table to the url serving its records
+    :return: dict with the validator and revalidate keyword arguments of `DiskCache.cached`
+    """
+    def validator(fetcher, _):
+        return {table: fetcher.validator(url) for table, url in endpoints.items()}
+
+    def revalidate(fetcher, stored):
+        if not stored or None in stored.values():
+            return False
+        return stored == validator(fetcher, None)
+
+    return {'validator': validator, 'revalidate': revalidate}
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import enum
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = [
+    'dfs_to_csv',
+    'write_csv',
+    'write_parquet',
+    'write_feather',
+    'write_xlsx',
+    'export_tables',
+    'read_tables',
+    'stream_tables',
+    'count_rows',
+    'EXPORT_DIR',
+    'EXPORT_FORMATS',
+    'EXCEL_MAX_ROWS',
+    'INTERNAL_TABLES',
+]
+
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'exports')
+# bookkeeping of the incremental sync, only exported if asked for by name
+INTERNAL_TABLES = ('sync_chunks',)
+# rows of a worksheet, including its header
+EXCEL_MAX_ROWS = 1048576
+
+
+def dfs_to_csv(fut, *, directory=EXPORT_DIR):
+    """A callback to write the DataFrames of a future to csv files.
+
+    :param fut: future holding a dict of DataFrames keyed by table name
+    :param directory: the directory to write to
+    :return: list of the written files
+    """
+    return write_csv(fut.result(), directory)
+
+
+def write_csv(dfs, directory=EXPORT_DIR):
+    """A function to write DataFrames to one csv file per table, chunk by chunk.
+
+    :param dfs: dict of DataFrames, or of iterables of DataFrame chunks, see `stream_tables`, keyed by table name
+    :param directory: the directory to write to
+    :return: list of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for key, value in dfs.items():
+        path = os.path.join(directory, key + '.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for number, chunk in enumerate(_chunks(value)):
+                chunk.to_csv(f, index=True, header=number == 0)
+        paths.append(path)
+    return paths
+
+
+def write_parquet(dfs, directory=EXPORT_DIR, *, compression='snappy', max_workers=4):
+    """A function to write DataFrames to one parquet file per table, concurrently. Needs pyarrow.
+
+    :param dfs: dict of DataFrames, or of iterables of DataFrame chunks, keyed by table name
+    :param directory: the directory to write to
+    :param compression: the parquet compression codec
+    :param max_workers: how many tables to write at once
+    :return: list of the written files
+    """
+    return _write_files(dfs, directory, '.parquet', lambda df, path: df.to_parquet(path, compression=compression),
+                        max_workers)
+
+
+def write_feather(dfs, directory=EXPORT_DIR, *, max_workers=4):
+    """A function to write DataFrames to one feather file per table, concurrently. Needs pyarrow.
+
+    :param dfs: dict of DataFrames, or of iterables of DataFrame chunks, keyed by table name
+    :param directory: the directory to write to
+    :param max_workers: how many tables to write at once
+    :return: list of the written files
+    """
+    return _write_files(dfs, directory, '.feather', lambda df, path: df.reset_index(drop=True).to_feather(path),
+                        max_workers)
+
+
+def _write_files(dfs, directory, extension, writer, max_workers):
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.join(directory, key + extension) for key in dfs.keys()]
+
+    def write(value, path):
+        writer(_plain(_whole(value)), path)
+
+    # pyarrow releases the gil while encoding and compressing, so the tables are written in parallel, each worker
+    # fetching and converting its own table
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futs = [pool.submit(write, value, path) for value, path in zip(dfs.values(), paths)]
+        for fut in futs:
+            fut.result()
+    return paths
+
+
+def write_xlsx(dfs, path, *, chunk_size=10000):
+    """A function to write DataFrames to an excel file with one sheet per table. Needs xlsxwriter.
+
+    The workbook is written in constant memory mode, row by row, converting only one chunk of a table at a time. Tables
+    with more rows than a sheet can hold are continued on further sheets, e.g. 'routines (2)'.
+
+    :param dfs: dict of DataFrames, or of iterables of DataFrame chunks, see `stream_tables`, keyed by table name
+    :param path: the file to write
+    :param chunk_size: how many rows of a DataFrame to convert at once
+    :return: list with the written file
+    """
+    import pandas as pd
+    import xlsxwriter
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+    try:
+        for key, value in dfs.items():
+            sheets = []
+            for chunk in _chunks(value, chunk_size):
+                chunk = _plain(chunk).astype(object)
+                chunk = chunk.where(pd.notnull(chunk), None)
+                if not sheets:
+                    header = [str(column) for column in chunk.columns]
+                    worksheet, row = _add_sheet(workbook, key, sheets, header)
+                for values in chunk.itertuples(index=False, name=None):
+                    if row == EXCEL_MAX_ROWS:
+                        worksheet, row = _add_sheet(workbook, key, sheets, header)
+                    worksheet.write_row(row, 0, values)
+                    row += 1
+    finally:
+        workbook.close()
+    return [path]
+
+
+def _add_sheet(workbook, key, sheets, header):
+    """Adds the next sheet of a table, the first named like the table, continuations e.g. 'routines (2)'."""
+    sheets.append(key[:31] if not sheets else f'{key[:25]} ({len(sheets) + 1})')
+    worksheet = workbook.add_worksheet(sheets[-1])
+    worksheet.write_row(0, 0, header)
+    return worksheet, 1
+
+
+def _chunks(value, chunk_size=None):
+    """Yields a DataFrame in chunks of chunk_size rows, or the chunks of an iterable of them."""
+    import pandas as pd
+
+    if not isinstance(value, pd.DataFrame):
+        yield from value
+    elif chunk_size is None or len(value) <= chunk_size:
+        yield value
+    else:
+        for start in range(0, len(value), chunk_size):
+            yield value.iloc[start:start + chunk_size]
+
+
+def _whole(value):
+    """Concatenates an iterable of DataFrame chunks, for the formats that need the whole table at once."""
+    import pandas as pd
+
+    return value if isinstance(value, pd.DataFrame) else pd.concat(list(value))
+
+
+def _plain(df):
+    """Replace enum members by their names, which neither arrow nor excel can store."""
+    columns = {}
+    for column in df.columns[(df.dtypes == object).to_numpy()]:
+        sample = df[column].dropna()
+        if len(sample) and isinstance(sample.iloc[0], enum.Enum):
+            columns[column] = df[column].map(lambda value: value.name if isinstance(value, enum.Enum) else value)
+    return df.assign(**columns) if columns else df
+
+
+EXPORT_FORMATS = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'feather': write_feather,
+    'xlsx': write_xlsx,
+}
+
+
+def export_tables(dfs, path, fmt, **kwargs):
+    """A function to export DataFrames in one of the EXPORT_FORMATS.
+
+    :param dfs: dict of DataFrames, or of iterables of DataFrame chunks, keyed by table name
+    :param path: the directory to write to, or the file for xlsx
+    :param fmt: the format
+    :return: list of the written files
+    """
+    assert fmt in EXPORT_FORMATS, f"Unknown export format '{fmt}'."
+    return EXPORT_FORMATS[fmt](dfs, path, **kwargs)
+
+
+def read_tables(db, names=None):
+    """A function to read tables of the database into DataFrames.
+
+    :param db: the database to read from
+    :param names: the tables to read, defaults to all tables of the models but the INTERNAL_TABLES
+    :return: dict of DataFrames keyed by table name
+    """
+    import pandas as pd
+
+    tables = db.Model.metadata.tables
+    ret = {}
+    with db.get_session() as session:
+        for name in names or _exported_tables(db):
+            result = session.execute(tables[name].select())
+            ret[name] = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+    return ret
+
+
+def stream_tables(db, names=None, *, chunk_size=10000):
+    """A function to read tables of the database lazily, in chunks fetched as they are written.
+
+    :param db: the database to read from
+    :param names: the tables to read, defaults to all tables of the models but the INTERNAL_TABLES
+    :param chunk_size: how many rows a chunk holds at maximum
+    :return: dict of iterables of DataFrame chunks keyed by table name, each can be iterated once
+    """
+    tables = db.Model.metadata.tables
+    return {name: _fetch_chunks(db, tables[name], chunk_size) for name in names or _exported_tables(db)}
+
+
+def _exported_tables(db):
+    return [name for name in db.Model.metadata.tables.keys() if name not in INTERNAL_TABLES]
+
+
+def _fetch_chunks(db, table, chunk_size):
+    import pandas as pd
+
+    with db.get_session() as session:
+        result = session.execute(table.select().execution_options(stream_results=True))
+        columns = list(result.keys())
+        offset = 0
+        while True:
+            rows = result.fetchmany(chunk_size)
+            # an empty table still yields its columns
+            if rows or not offset:
+                yield pd.DataFrame.from_records(rows, columns=columns, index=pd.RangeIndex(offset, offset + len(rows)))
+            offset += len(rows)
+            if len(rows) < chunk_size:
+                break
+
+
+def count_rows(db, names=None):
+    """A function to count the rows of tables of the database.
+
+    :param db: the database to count in
+    :param names: the tables to count, defaults to all tables of the models
+    :return: dict of row counts keyed by table name
+    """
+    from sqlalchemy import select, func
+
+    tables = db.Model.metadata.tables
+    with db.get_session() as session:
+        return {name: session.execute(select([func.count()]).select_from(tables[name])).scalar()
+                for name in names or tables.keys()}
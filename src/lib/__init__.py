@@ -1,3 +1,23 @@
-from .db import *
-from .driver import *
-from .concurrent import *
\ No newline at end of file
+# -*- coding: utf-8 -*-
+from importlib import import_module
+
+# The submodules are only imported once one of their names is requested, so that e.g. the ui can start without
+# loading selenium or sqlalchemy. They are searched cheapest first.
+_SUBMODULES = ('jobs', 'concurrent', 'fastjson', 'cache', 'fetcher', 'db', 'driver')
+
+
+def _exported(module):
+    return getattr(module, '__all__', None) or [name for name in dir(module) if not name.startswith('_')]
+
+
+def __getattr__(name):
+    for submodule in _SUBMODULES:
+        module = import_module(f'.{submodule}', __name__)
+        if name in _exported(module):
+            return getattr(module, name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | {name for submodule in _SUBMODULES
+                                    for name in _exported(import_module(f'.{submodule}', __name__))})
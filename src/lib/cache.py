@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+import pickle
+import struct
+from threading import RLock
+from time import time
+from typing import NamedTuple, Any
+
+from .concurrent import TaskBase
+
+__all__ = [
+    'DiskCache',
+    'CacheEntry',
+    'CachedTask',
+]
+
+
+# every entry starts with the time it was stored at, so revalidating an entry only rewrites these bytes
+_HEADER = struct.Struct('<d')
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+CacheEntry = NamedTuple('CacheEntry', [('value', Any), ('validator', Any), ('stored_at', float), ('fresh', bool)])
+
+
+class DiskCache:
+    """A content addressed on disk cache for task results with ttl and size based lru eviction."""
+    def __init__(self, directory, *, ttl=24 * 60 * 60, max_size=512 * 1024 ** 2):
+        self.logger = logging.getLogger('DiskCache')
+        self._directory = directory
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts, **params):
+        """A method to create a cache key out of e.g. url, table and parameters.
+
+        The parts and parameters have to be plain values, i.e. strings, numbers, None or lists, tuples and dicts of
+        them, whose repr is the same in every run, unlike the one of e.g. a callable or a database.
+
+        :return: hex digest identifying the given parts
+        """
+        description = repr((_plain(parts), _plain(params)))
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._directory, key[:2], key + '.pickle')
+
+    def load(self, key):
+        """A method to load an entry, marking it as recently used.
+
+        :param key: the key of the entry
+        :return: the CacheEntry or None if there is none
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    stored_at, = _HEADER.unpack(f.read(_HEADER.size))
+                    validator, value = pickle.load(f)
+            except (OSError, EOFError, struct.error, pickle.UnpicklingError):
+                return None
+            os.utime(path)
+        return CacheEntry(value, validator, stored_at, time() - stored_at < self._ttl)
+
+    def store(self, key, value, *, validator=None, stored_at=None):
+        """A method to store a value, evicting the least recently used entries if the cache grew too large.
+
+        :param key: the key of the entry
+        :param value: the value to store, has to be picklable
+        :param validator: e.g. an etag to revalidate the entry with once it is stale
+        :param stored_at: the time to store the entry as, defaults to now
+        """
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(_HEADER.pack(stored_at or time()))
+                pickle.dump((validator, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            self.evict()
+
+    def touch(self, key):
+        """A method to mark an entry as fresh again after it was revalidated.
+
+        Only the stored time at the start of the file is rewritten, the value is left as it is. Writing also bumps the
+        modification time, which marks the entry as recently used.
+
+        :param key: the key of the entry
+        """
+        with self._lock:
+            try:
+                with open(self._path(key), 'r+b') as f:
+                    f.write(_HEADER.pack(time()))
+            except OSError:
+                pass
+
+    def evict(self):
+        """A method to drop least recently used entries until the cache fits its size limit."""
+        with self._lock:
+            files = []
+            for root, _, names in os.walk(self._directory):
+                for name in names:
+                    if name.endswith('.pickle'):
+                        stat = os.stat(os.path.join(root, name))
+                        files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+            size = sum(file_size for _, file_size, _ in files)
+            for _, file_size, path in sorted(files):
+                if size <= self._max_size:
+                    break
+                self.logger.debug(f'Evicting {path}')
+                os.remove(path)
+                size -= file_size
+
+    def clear(self):
+        with self._lock:
+            for root, _, names in os.walk(self._directory):
+                for name in names:
+                    if name.endswith('.pickle'):
+                        os.remove(os.path.join(root, name))
+
+    def cached(self, task, *, key=None, validator=None, revalidate=None):
+        """A method to put the cache in front of a task.
+
+        :param task: the task to cache, e.g. `extract_soup(url)` or `extract_index_db(url, tables)`
+        :param key: the cache key, defaults to one made of the task name and arguments, which then have to be plain
+                    values, see `make_key`
+        :param validator: callable taking the processor and the result, returning e.g. an etag to store with it
+        :param revalidate: callable taking the processor and the stored validator, returning whether a stale entry
+                           is still up to date
+        :return: the cached task
+        """
+        return CachedTask(self, task, key=key, validator=validator, revalidate=revalidate)
+
+
+class CachedTask(TaskBase):
+    def __init__(self, cache, task, *, key=None, validator=None, revalidate=None):
+        super(CachedTask, self).__init__('Cached' + task.name)
+        self._cache = cache
+        self._task = task
+        self._key = key or DiskCache.make_key(task.name, *task.args, **task.kwargs)
+        self._validator = validator
+        self._revalidate = revalidate
+
+    def __call__(self, processor):
+        entry = self._cache.load(self._key)
+        if entry is not None:
+            if entry.fresh:
+                self.logger.debug(f'Cache hit for {self._key}')
+                return entry.value
+            if self._revalidate is not None and self._revalidate(processor, entry.validator):
+                self.logger.debug(f'Revalidated stale entry {self._key}')
+                self._cache.touch(self._key)
+                return entry.value
+        value = self._task(processor)
+        validator = self._validator(processor, value) if self._validator is not None else None
+        self._cache.store(self._key, value, validator=validator)
+        return value
+
+
+def _plain(value):
+    """Normalizes a value for a cache key, dicts become sorted tuples of their items."""
+    if isinstance(value, dict):
+        return tuple(sorted((_plain(key), _plain(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_plain(item) for item in value)
+    assert isinstance(value, _PLAIN_TYPES), f'Cache keys can only be made of plain values, not {value!r}.'
+    return value
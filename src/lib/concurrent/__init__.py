@@ -1,2 +1,6 @@
+from .metrics import *
+from .retry import *
+from .offload import *
 from .processor import *
-from .task import *
\ No newline at end of file
+from .task import *
+from .graph import *
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from threading import Lock
+from typing import NamedTuple, Any, Tuple
+
+from .task import TaskBase
+
+__all__ = [
+    'TaskGraph',
+    'GraphRun',
+    'Node',
+]
+
+
+Node = NamedTuple('Node', [('name', str), ('task', Any), ('depends_on', Tuple[str, ...]), ('offload', bool)])
+
+
+class TaskGraph:
+    """A dependency graph of tasks, run on a ConcurrentProcessor as soon as their dependencies are done.
+
+    A node is either a task, e.g. `extract_index_db(url, ['begegnung'])`, which is done through the processor like
+    any other task, or a plain callable, which is run on the worker pool with the results of its dependencies as
+    arguments, or on the process pool if it is added with `offload=True`.
+    """
+    def __init__(self):
+        self._nodes = OrderedDict()
+
+    @property
+    def nodes(self):
+        return list(self._nodes.values())
+
+    def add(self, name, task, *, depends_on=(), offload=False):
+        """A method to add a node. Dependencies have to be added first, which keeps the graph acyclic.
+
+        :param name: unique name of the node
+        :param task: the task or callable to run
+        :param depends_on: names of the nodes that have to be done before
+        :param offload: whether to run a CPU heavy callable on the process pool, see `ConcurrentProcessor.offload`
+        :return: the graph, for chaining
+        """
+        assert not offload or not isinstance(task, TaskBase), f"Node '{name}' is a task, only callables are offloaded."
+        assert name not in self._nodes, f"Node '{name}' already exists."
+        missing = [dependency for dependency in depends_on if dependency not in self._nodes]
+        assert not missing, f"Node '{name}' depends on unknown nodes {missing}."
+        self._nodes[name] = Node(name, task, tuple(depends_on), offload)
+        return self
+
+    def run(self, processor):
+        """A method to start running the graph.
+
+        :param processor: the ConcurrentProcessor to run the nodes on
+        :return: the GraphRun
+        """
+        return GraphRun(self, processor)
+
+
+class GraphRun:
+    """A running TaskGraph. A failed node cancels all of its descendants, independent branches keep running."""
+    def __init__(self, graph, processor):
+        self._logger = logging.getLogger(self.__class__.__qualname__)
+        self._processor = processor
+        self._lock = Lock()
+        self.futures = OrderedDict((node.name, Future()) for node in graph.nodes)
+        dependents = {node.name: [] for node in graph.nodes}
+        for node in graph.nodes:
+            for dependency in node.depends_on:
+                dependents[dependency].append(node)
+        self._pending = {node.name: len(node.depends_on) for node in graph.nodes}
+        self._cancelled = set()
+        for node in graph.nodes:
+            self.futures[node.name].add_done_callback(
+                lambda fut, node=node: self._on_done(node, dependents[node.name], fut))
+        for node in graph.nodes:
+            if not node.depends_on:
+                self._start(node)
+
+    def _start(self, node):
+        fut = self.futures[node.name]
+        if not fut.set_running_or_notify_cancel():
+            return
+        if isinstance(node.task, TaskBase):
+            inner = self._processor.do(node.task)
+        else:
+            inputs = [self.futures[dependency].result() for dependency in node.depends_on]
+            run = self._processor.offload if node.offload else self._processor.submit
+            inner = run(node.task, *inputs, name=node.name)
+        inner.add_done_callback(lambda inner: self._transfer(inner, fut))
+
+    @staticmethod
+    def _transfer(inner, fut):
+        if inner.cancelled():
+            fut.set_exception(RuntimeError('Task got cancelled'))
+        elif inner.exception() is not None:
+            fut.set_exception(inner.exception())
+        else:
+            fut.set_result(inner.result())
+
+    def _on_done(self, node, dependents, fut):
+        if fut.cancelled() or fut.exception() is not None:
+            if not fut.cancelled():
+                self._logger.warning(f"Node '{node.name}' failed: {fut.exception()!r}")
+            for dependent in dependents:
+                # a dependent of several failed nodes is only cancelled by the first of them
+                with self._lock:
+                    if dependent.name in self._cancelled:
+                        continue
+                    self._cancelled.add(dependent.name)
+                dependent_fut = self.futures[dependent.name]
+                if dependent_fut.cancel():
+                    # moves the future on to cancelled and notified, so waiters see it as done
+                    dependent_fut.set_running_or_notify_cancel()
+            return
+        for dependent in dependents:
+            with self._lock:
+                self._pending[dependent.name] -= 1
+                ready = self._pending[dependent.name] == 0
+            if ready:
+                self._start(dependent)
+
+    def wait(self, timeout=None):
+        """A method to wait for all nodes to be done or cancelled.
+
+        :param timeout: how long to wait at maximum
+        :return: dict with the results of the nodes that succeeded
+        """
+        wait(self.futures.values(), timeout=timeout)
+        return {name: fut.result() for name, fut in self.futures.items()
+                if fut.done() and not fut.cancelled() and fut.exception() is None}
+
+    @property
+    def errors(self):
+        """Dict with the exceptions of the nodes that failed, cancelled descendants are left out."""
+        return {name: fut.exception() for name, fut in self.futures.items()
+                if fut.done() and not fut.cancelled() and fut.exception() is not None}
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import json
+from contextlib import contextmanager
+from threading import Lock, RLock
+from time import perf_counter
+
+__all__ = [
+    'Metrics',
+    'InstrumentedLock',
+]
+
+
+class Metrics:
+    """A threadsafe collection of timers, counters and gauges, each optionally labelled e.g. by task name."""
+    def __init__(self):
+        self._lock = Lock()
+        self._timers = {}
+        self._counters = {}
+        self._gauges = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, seconds, **labels):
+        """A method to record a duration.
+
+        :param name: name of the timer
+        :param seconds: the duration
+        :param labels: labels, e.g. task='ExtractIndexDbTask'
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            count, total, maximum = self._timers.get(key, (0, 0.0, 0.0))
+            self._timers[key] = (count + 1, total + seconds, max(maximum, seconds))
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """A contextmanager recording the duration of its body."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start, **labels)
+
+    def increment(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add_to_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def snapshot(self):
+        """A method to get a copy of all metrics.
+
+        :return: dict with lists of timers, counters and gauges
+        """
+        with self._lock:
+            return {
+                'timers': [dict(name=name, labels=dict(labels), count=count, total_seconds=total, max_seconds=maximum)
+                           for (name, labels), (count, total, maximum) in sorted(self._timers.items())],
+                'counters': [dict(name=name, labels=dict(labels), value=value)
+                             for (name, labels), value in sorted(self._counters.items())],
+                'gauges': [dict(name=name, labels=dict(labels), value=value)
+                           for (name, labels), value in sorted(self._gauges.items())],
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, *, prefix='stb_'):
+        """A method to render all metrics in the prometheus text format, timers as summaries.
+
+        :param prefix: prefix of all metric names
+        :return: the text
+        """
+        def labels(values):
+            return '{' + ','.join(f'{key}="{value}"' for key, value in values.items()) + '}' if values else ''
+
+        snapshot = self.snapshot()
+        lines = []
+        for timer in snapshot['timers']:
+            name = prefix + timer['name']
+            lines.append(f'{name}_count{labels(timer["labels"])} {timer["count"]}')
+            lines.append(f'{name}_sum{labels(timer["labels"])} {timer["total_seconds"]}')
+            lines.append(f'{name}_max{labels(timer["labels"])} {timer["max_seconds"]}')
+        for counter in snapshot['counters']:
+            lines.append(f'{prefix}{counter["name"]}_total{labels(counter["labels"])} {counter["value"]}')
+        for gauge in snapshot['gauges']:
+            lines.append(f'{prefix}{gauge["name"]}{labels(gauge["labels"])} {gauge["value"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """A method to write all metrics to a file, as json if the path ends with .json, else as prometheus text.
+
+        :param path: the file to write
+        """
+        with open(path, 'w') as f:
+            f.write(self.to_json() if path.endswith('.json') else self.to_prometheus())
+
+
+class InstrumentedLock:
+    """An RLock recording how long threads wait to acquire it."""
+    def __init__(self, metrics, name):
+        self._lock = RLock()
+        self._metrics = metrics
+        self._name = name
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self._metrics.observe('lock_wait_seconds', perf_counter() - start, lock=self._name)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
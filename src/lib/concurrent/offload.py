@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import pickle
+from typing import NamedTuple
+
+__all__ = [
+    'Packed',
+    'pack',
+    'unpack',
+    'run_packed',
+]
+
+
+class Packed(NamedTuple):
+    """An object turned into a single byte string, which crosses process boundaries as one flat buffer.
+
+    DataFrames with plain columns travel as an Arrow IPC stream, so string columns don't become an object graph,
+    anything else as a protocol 5 pickle, which writes the buffers of numpy arrays in one piece.
+    """
+    kind: str
+    data: bytes
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+
+def pack(obj):
+    """A function to pack an object for another process, see `Packed`.
+
+    :param obj: the object to pack
+    :return: the Packed object
+    """
+    packed = _pack_arrow(obj)
+    if packed is not None:
+        return packed
+    return Packed('pickle', pickle.dumps(obj, protocol=5))
+
+
+def unpack(packed):
+    """A function to restore a packed object.
+
+    :param packed: the Packed object
+    :return: the object
+    """
+    if packed.kind == 'arrow':
+        import pyarrow as pa
+        return pa.ipc.open_stream(packed.data).read_all().to_pandas()
+    return pickle.loads(packed.data)
+
+
+def run_packed(func, *packed_args):
+    """Runs a function on packed arguments in a worker process and packs its result."""
+    return pack(func(*(unpack(packed) for packed in packed_args)))
+
+
+def _pack_arrow(obj):
+    """Packs a DataFrame as an Arrow IPC stream, if pyarrow is installed and every column maps onto arrow as is."""
+    try:
+        import pandas as pd
+        import pyarrow as pa
+        from pandas.api.types import infer_dtype
+    except ImportError:
+        return None
+    if not isinstance(obj, pd.DataFrame) or not obj.columns.is_unique or not isinstance(obj.index, pd.RangeIndex):
+        return None
+    for column in obj.columns:
+        # nested json objects would come back as structs, mixed columns would not convert at all
+        if obj[column].dtype == object and infer_dtype(obj[column], skipna=True) not in ('string', 'empty'):
+            return None
+    try:
+        table = pa.Table.from_pandas(obj, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Packed('arrow', sink.getvalue().to_pybytes())
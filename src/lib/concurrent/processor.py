@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from threading import RLock
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from time import perf_counter
 
-from .task import multiple_dispatch_callback, ToDo, ToDos
+from .metrics import Metrics, InstrumentedLock
+from .offload import pack, unpack, run_packed
+from .task import multiple_dispatch_callback, TaskBase, ToDo, ToDos
 
 __all__ = [
     'ConcurrentProcessor',
@@ -11,12 +14,15 @@ __all__ = [
 
 
 class ConcurrentProcessor:
-    def __init__(self, *, max_workers=8):
+    def __init__(self, *, max_workers=8, process_workers=0):
         self._logger = logging.getLogger(self.__class__.__qualname__)
 
         self._logger.info('Starting ThreadPoolExecutor...')
         self._worker_pool = ThreadPoolExecutor(max_workers=max_workers)
-        self._lock = RLock()
+        self._process_workers = process_workers
+        self._process_pool = None
+        self.metrics = Metrics()
+        self._lock = InstrumentedLock(self.metrics, self.__class__.__qualname__)
         self._resource = None
 
     def __getattr__(self, item):
@@ -29,6 +35,8 @@ class ConcurrentProcessor:
         with self._lock:
             self._logger.info('Deleting ConcurrentProcessor...')
             self._worker_pool.shutdown()
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
 
     def do(self, task, *callbacks, chain_callbacks=False):
         """A method to submit a task request and callback to the drivers worker pool.
@@ -36,11 +44,70 @@ class ConcurrentProcessor:
         :param task: task to do
         :param callbacks: multiple callbacks to run on result
         :param chain_callbacks: used to pass result from one callback to the next
+        :return: the future of the task
         """
         if len(callbacks):
-            self._do(ToDo(task, multiple_dispatch_callback(*callbacks, chain=chain_callbacks)))
+            return self._do(ToDo(task, multiple_dispatch_callback(*callbacks, chain=chain_callbacks)))
         else:
-            self._do(ToDo(task, lambda fut: self._logger.debug(f"Doing nothing with {fut}")))
+            return self._do(ToDo(task, lambda fut: self._logger.debug(f"Doing nothing with {fut}")))
+
+    def submit(self, func, *args, name=None):
+        """A method to run a plain callable on the worker pool, without handing it the processor or its resource.
+
+        :param func: the callable
+        :param args: the arguments to call it with
+        :param name: the name to record its metrics under
+        :return: the future of the call
+        """
+        todo = ToDo(TaskBase(name or getattr(func, '__name__', 'Callable')), lambda fut: None)
+        return self._submit(todo, func, *args)
+
+    def offload(self, func, *args, name=None):
+        """A method to run a CPU heavy function, e.g. parsing, cleanup or aggregation, on the process pool.
+
+        The arguments and the result are packed, see `pack`, so func and the objects it works on have to be picklable,
+        func at module level. Without process workers func runs right away in the calling thread, callers block on the
+        result, often from a worker thread, which must not wait for another slot of the same pool.
+
+        :param func: the function
+        :param args: the arguments to call it with
+        :param name: the name to record its metrics under
+        :return: the future of the call
+        """
+        name = name or getattr(func, '__name__', 'Callable')
+        if not self._process_workers:
+            fut = Future()
+            try:
+                with self.metrics.timer('task_run_seconds', task=name):
+                    fut.set_result(func(*args))
+            except Exception as e:
+                self.metrics.increment('task_failures', task=name)
+                fut.set_exception(e)
+            return fut
+        with self._lock:
+            if self._process_pool is None:
+                self._logger.info('Starting ProcessPoolExecutor...')
+                # spawned workers don't inherit the locks of the browser and worker threads
+                self._process_pool = ProcessPoolExecutor(max_workers=self._process_workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+        self.metrics.increment('tasks_offloaded', task=name)
+        packed_args = [pack(arg) for arg in args]
+        self.metrics.increment('offload_bytes', sum(packed.nbytes for packed in packed_args), task=name)
+        started_at = perf_counter()
+        inner = self._process_pool.submit(run_packed, func, *packed_args)
+        fut = Future()
+
+        def callback(inner):
+            self.metrics.observe('task_run_seconds', perf_counter() - started_at, task=name)
+            if inner.exception() is not None:
+                self.metrics.increment('task_failures', task=name)
+                self._logger.error(f'{name} failed: {inner.exception()!r}')
+                fut.set_exception(inner.exception())
+            else:
+                fut.set_result(unpack(inner.result()))
+
+        inner.add_done_callback(callback)
+        return fut
 
     def _do_multiple(self, todos):
         """A methode to do multiple todos
@@ -55,7 +122,41 @@ class ConcurrentProcessor:
         """A methode to submit a todo object to the worker pool
 
         :param todo: the todo to do
+        :return: the future of the todo
         """
         assert isinstance(todo, ToDo), 'Can only do ToDos...'
-        fut = self._worker_pool.submit(todo.task, self)
-        fut.add_done_callback(todo.callback)
\ No newline at end of file
+        return self._submit(todo, todo.task, self)
+
+    def _submit(self, todo, func, *args):
+        """A methode to submit a todo to the worker pool, recording queue depth, queue time, run time and
+        callback time of its task.
+
+        :param todo: the todo to do
+        :param func: what to run on the worker pool
+        :param args: the arguments to run it with
+        :return: the future of the todo
+        """
+        name = getattr(todo.task, 'name', todo.task.__class__.__name__)
+        self.metrics.increment('tasks_submitted', task=name)
+        self.metrics.add_to_gauge('queue_depth', 1)
+        fut = self._worker_pool.submit(self._run_instrumented, name, perf_counter(), func, *args)
+
+        def callback(fut):
+            with self.metrics.timer('task_callback_seconds', task=name):
+                todo.callback(fut)
+
+        fut.add_done_callback(callback)
+        return fut
+
+    def _run_instrumented(self, name, submitted_at, func, *args):
+        self.metrics.observe('task_queue_seconds', perf_counter() - submitted_at, task=name)
+        self.metrics.add_to_gauge('queue_depth', -1)
+        started_at = perf_counter()
+        try:
+            return func(*args)
+        except Exception:
+            self.metrics.increment('task_failures', task=name)
+            self._logger.exception(f'{name} failed')
+            raise
+        finally:
+            self.metrics.observe('task_run_seconds', perf_counter() - started_at, task=name)
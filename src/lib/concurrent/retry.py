@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import logging
+import random
+from threading import Lock
+from time import monotonic, sleep
+
+__all__ = [
+    'RetryPolicy',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'DeadlineExceeded',
+]
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calls after too many consecutive failures, letting a single trial call through after a cool down."""
+    def __init__(self, *, failure_threshold=5, reset_timeout=60):
+        self._logger = logging.getLogger(self.__class__.__qualname__)
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None and monotonic() - self._opened_at < self._reset_timeout
+
+    def before_call(self):
+        """A method to be called before every call, raising CircuitOpenError while the circuit is open."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if monotonic() - self._opened_at < self._reset_timeout:
+                raise CircuitOpenError(f'Circuit open after {self._failures} consecutive failures')
+            # half open: let this call through, a failure opens the circuit again right away
+            self._opened_at = None
+            self._failures = self._failure_threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self._failure_threshold and self._opened_at is None:
+                self._logger.warning(f'Opening circuit after {self._failures} consecutive failures')
+                self._opened_at = monotonic()
+
+
+class RetryPolicy:
+    """Retries a call with exponential backoff and jitter, within a maximum of attempts and a hard deadline."""
+    def __init__(self, *, max_attempts=3, base_delay=1.0, max_delay=30.0, jitter=0.5, deadline=None,
+                 retry_on=(Exception,), give_up_on=(AssertionError, CircuitOpenError), breaker=None):
+        """
+        :param max_attempts: how often to call at maximum
+        :param base_delay: the delay before the first retry, doubled for every further one
+        :param max_delay: the ceiling of the delay
+        :param jitter: the fraction of the delay that is randomised
+        :param deadline: seconds after which no further attempt is started
+        :param retry_on: exceptions worth retrying
+        :param give_up_on: exceptions never worth retrying, even if they match retry_on
+        :param breaker: a CircuitBreaker shared by every call under this policy
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.give_up_on = give_up_on
+        self.breaker = breaker
+
+    def delay(self, attempt):
+        """The delay before the given retry, starting at 1."""
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def run(self, func, *, on_retry=None):
+        """A method to call a function under this policy.
+
+        :param func: the function to call without arguments
+        :param on_retry: callable taking the attempt and the exception, called before every retry
+        :return: the result of the function
+        """
+        started_at = monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker is not None:
+                self.breaker.before_call()
+            try:
+                result = func()
+            except self.retry_on as e:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                if isinstance(e, self.give_up_on) or attempt >= self.max_attempts or \
+                        (self.breaker is not None and self.breaker.is_open):
+                    raise
+                delay = self.delay(attempt)
+                if self.deadline is not None and monotonic() - started_at + delay > self.deadline:
+                    raise DeadlineExceeded(f'Giving up after {attempt} attempts, deadline of {self.deadline}s') from e
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                sleep(delay)
+            else:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return result
@@ -15,19 +15,30 @@ __all__ = [
 ]
 
 
-def make_task_factory(func):
-    """Decorator to create a task factory from method."""
+def make_task_factory(func=None, *, retry=None):
+    """Decorator to create a task factory from method.
+
+    Can be used bare or with a RetryPolicy, e.g. `@make_task_factory(retry=policy)`, under which every task of the
+    factory is run unless it gets another one through `with_retry`. Tasks of coroutine functions return a coroutine
+    when called, to be run by an AsyncDriver, and are not retried.
+    """
+    if func is None:
+        return lambda func: make_task_factory(func, retry=retry)
     task_name = snake_to_camel(func.__name__ + '_task')
 
     class Task(TaskBase):
         def __init__(self, *init_args, **init_kwargs):
             super(Task, self).__init__(task_name)
-            self._args = init_args
-            self._kwargs = init_kwargs
+            self.args = init_args
+            self.kwargs = init_kwargs
+            self.retry = retry
             self._func = func
 
         def __call__(self, processor):
-            return self._func(processor, *self._args, **self._kwargs)
+            if self.retry is None:
+                return self._func(processor, *self.args, **self.kwargs)
+            return self.retry.run(lambda: self._func(processor, *self.args, **self.kwargs),
+                                  on_retry=lambda attempt, e: self.on_retry(processor, attempt, e))
 
     Task.__name__ = task_name
 
@@ -40,11 +51,32 @@ def make_task_factory(func):
 
 class TaskBase:
     def __init__(self, task_name):
+        self.name = task_name
         self.logger = logging.getLogger(task_name)
+        self.retry = None
 
     def __call__(self, processor):
         pass
 
+    def with_retry(self, policy):
+        """A method to run this task under another RetryPolicy, or none.
+
+        :param policy: the RetryPolicy
+        :return: the task, for chaining
+        """
+        self.retry = policy
+        return self
+
+    def on_retry(self, processor, attempt, e):
+        """Called before a retry, counts it and lets the processor recover, e.g. by restarting a crashed browser."""
+        self.logger.warning(f'Attempt {attempt} failed with {e!r}, retrying...')
+        metrics = getattr(processor, 'metrics', None)
+        if metrics is not None:
+            metrics.increment('task_retries', task=self.name)
+        recover = getattr(processor, 'recover', None)
+        if recover is not None:
+            recover(e)
+
 
 ToDo = NamedTuple('ToDo', [('task', TaskBase), ('callback', Callable[[Future], None])])
 ToDos = List[ToDo]
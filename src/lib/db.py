@@ -1,9 +1,12 @@
 import logging
+import os
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, Column
+from sqlalchemy import create_engine, event, Column
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
 
 from .helpers import Singleton
 
@@ -19,11 +22,19 @@ class DB(metaclass=Singleton):
                          f'{str({key: getattr(self, key) for key, item in self.__dict__ if isinstance(item, Column)})}>'
             )
 
-    def __init__(self, *, echo=False):
+    SQLITE_PRAGMAS = (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -64 * 1024),
+        ('mmap_size', 256 * 1024 ** 2),
+        ('temp_store', 'MEMORY'),
+    )
+
+    def __init__(self, *, echo=False, descriptor='sqlite:///:memory:'):
         self.logger = logging.getLogger('DB')
 
-        self.logger.info('Creating database engine...')
-        self._engine = DB.create(echo=echo)
+        self.logger.info(f'Creating database engine for {descriptor}...')
+        self._engine = DB.create(echo=echo, descriptor=descriptor)
 
         self.logger.info('Creating session factory...')
         self._session_factory = sessionmaker(bind=self._engine)
@@ -47,6 +58,32 @@ class DB(metaclass=Singleton):
 
     @staticmethod
     def create(*, echo=False, descriptor='sqlite:///:memory:'):
-        engine = create_engine(descriptor, echo=echo)
+        url = make_url(descriptor)
+        in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+        if in_memory:
+            # every connection would get a database of its own, so all threads share a single one
+            engine = create_engine(url, echo=echo, poolclass=StaticPool, connect_args={'check_same_thread': False})
+        else:
+            engine = create_engine(url, echo=echo)
+        if engine.dialect.name == 'sqlite':
+            pragmas = [(key, value) for key, value in DB.SQLITE_PRAGMAS if not (in_memory and key == 'journal_mode')]
+
+            @event.listens_for(engine, 'connect')
+            def set_pragmas(dbapi_connection, _):
+                cursor = dbapi_connection.cursor()
+                for key, value in pragmas:
+                    cursor.execute(f'PRAGMA {key}={value}')
+                cursor.close()
         DB.Model.metadata.create_all(engine)
         return engine
+
+    @staticmethod
+    def sqlite_descriptor(path):
+        """A method to create the descriptor of a file backed sqlite database, creating its directory if needed.
+
+        :param path: path of the database file
+        :return: the descriptor to pass as `descriptor`
+        """
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return 'sqlite:///' + path
@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 from .base import *
-from .task import *
\ No newline at end of file
+from .conditions import *
+from .pool import *
+from .aio import *
+from .task import *
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import logging
+import os
+import socket
+from contextlib import asynccontextmanager
+from itertools import count
+from threading import Thread
+from time import monotonic
+
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from ..concurrent import multiple_dispatch_callback
+from .conditions import document_ready
+
+__all__ = [
+    'AsyncDriver',
+    'WebDriverClient',
+]
+
+
+# runs an async script like /execute/async would, but keeps its result on the page instead of waiting for it
+_START_JS_SNIPPET = """
+var token = arguments[0];
+var results = window.__asyncDriverResults = window.__asyncDriverResults || {};
+var done = function(value) {
+    results[token] = {value: value};
+};
+try {
+    Function(arguments[1]).apply(window, arguments[2].concat([done]));
+} catch(e) {
+    results[token] = {error: String(e)};
+}
+"""
+
+_RESULT_JS_SNIPPET = """
+var results = window.__asyncDriverResults || {};
+var result = results[arguments[0]] || null;
+delete results[arguments[0]];
+return result;
+"""
+
+
+class WebDriverClient:
+    """A minimal asyncio client for the W3C WebDriver http protocol, as spoken by geckodriver."""
+    def __init__(self, host, port):
+        self._host = host
+        self._port = port
+        self._lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+
+    async def command(self, method, path, payload=None):
+        """A coroutine sending one command and returning the value of its response.
+
+        :param method: the http method
+        :param path: the command path, e.g. '/session'
+        :param payload: the json payload
+        :return: the 'value' of the response
+        """
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (f'{method} {path} HTTP/1.1\r\nHost: {self._host}:{self._port}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n'
+                f'Connection: keep-alive\r\n\r\n').encode('ascii')
+        async with self._lock:
+            await self._connect()
+            self._writer.write(head + body)
+            await self._writer.drain()
+            status_line = await self._reader.readline()
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = (await self._reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                key, _, value = line.partition(':')
+                headers[key.strip().lower()] = value.strip()
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+            if headers.get('connection', '').lower() == 'close':
+                self._writer.close()
+        value = json.loads(data.decode('utf-8')).get('value') if data else None
+        if status >= 400:
+            error = value or {}
+            if error.get('error') == 'script timeout' or error.get('error') == 'timeout':
+                raise TimeoutException(error.get('message'))
+            raise WebDriverException(f"{error.get('error')}: {error.get('message')}")
+        return value
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class AsyncDriver:
+    """An asyncio based driver, many tabs of one browser are worked on concurrently by a single event loop.
+
+    The browser is driven through geckodriver directly. Coroutines have to run on `loop`, which runs in a
+    background thread. Tasks created by `make_task_factory` out of coroutine functions can be handed to `do`
+    like on any other processor.
+    """
+    def __init__(self, *, path=None, home_address=None, headless=True):
+        self._logger = logging.getLogger(self.__class__.__qualname__)
+        self.loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self.loop.run_forever, name='AsyncDriverLoop', daemon=True)
+        self._thread.start()
+        self._process = None
+        self._client = None
+        self._session = None
+        self._context_lock = None
+        self._tokens = count()
+        self._run(self.start(path=path, home_address=home_address, headless=headless))
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def start(self, *, path=None, home_address=None, headless=True):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        executable = path or 'geckodriver'
+        if os.name == 'nt' and not executable.endswith('.exe'):
+            executable += '.exe'
+        self._logger.info('Starting Geckodriver...')
+        self._process = await asyncio.create_subprocess_exec(executable, '--port', str(port),
+                                                             stdout=asyncio.subprocess.DEVNULL,
+                                                             stderr=asyncio.subprocess.DEVNULL)
+        self._client = WebDriverClient('127.0.0.1', port)
+        self._context_lock = asyncio.Lock()
+        deadline = monotonic() + 30
+        while True:
+            try:
+                await self._client.command('GET', '/status')
+                break
+            except OSError:
+                if monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+        capabilities = {'browserName': 'firefox', 'pageLoadStrategy': 'none',
+                        'moz:firefoxOptions': {'args': ['-headless'] if headless else []}}
+        value = await self._client.command('POST', '/session', {'capabilities': {'alwaysMatch': capabilities}})
+        self._session = f"/session/{value['sessionId']}"
+        if home_address:
+            await self.get(home_address)
+
+    def quit(self):
+        self._run(self.quit_async())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    async def quit_async(self):
+        self._logger.info('Closing driver...')
+        try:
+            await self._client.command('DELETE', self._session)
+        except Exception:
+            pass
+        await self._client.close()
+        if self._process is not None and self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+
+    def do(self, task, *callbacks, chain_callbacks=False):
+        """A method to run a task created out of a coroutine function on the event loop.
+
+        :param task: task to do
+        :param callbacks: multiple callbacks to run on result
+        :param chain_callbacks: used to pass result from one callback to the next
+        :return: the future of the task
+        """
+        fut = asyncio.run_coroutine_threadsafe(task(self), self.loop)
+        if len(callbacks):
+            fut.add_done_callback(multiple_dispatch_callback(*callbacks, chain=chain_callbacks))
+        return fut
+
+    async def _command(self, method, path='', payload=None):
+        return await self._client.command(method, self._session + path, payload)
+
+    async def get(self, url):
+        async with self._context_lock:
+            await self._command('POST', '/url', {'url': url})
+
+    async def execute(self, handle, script, *args):
+        """A coroutine running a script in a tab.
+
+        :param handle: the window handle of the tab
+        :param script: the js to run
+        :param args: arguments available as `arguments`
+        :return: the return value of the script
+        """
+        async with self._context_lock:
+            await self._command('POST', '/window', {'handle': handle})
+            return await self._command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def execute_async(self, handle, script, *args, timeout=60, poll_interval=0.05, max_poll_interval=1.0):
+        """A coroutine running an async script in a tab, see `execute`.
+
+        The script is only started, its result is kept on the page and polled for with exponential backoff. A
+        WebDriver session runs one command at a time, so the scripts of other tabs run in between.
+
+        :param timeout: how long the script may take
+        :param poll_interval: the initial delay between two polls
+        :param max_poll_interval: the ceiling of the delay between two polls
+        """
+        token = f'script-{next(self._tokens)}'
+        await self.execute(handle, _START_JS_SNIPPET, token, script, list(args))
+        deadline = monotonic() + timeout
+        while True:
+            result = await self.execute(handle, _RESULT_JS_SNIPPET, token)
+            if result is not None:
+                if 'error' in result:
+                    raise WebDriverException(f"javascript error: {result['error']}")
+                return result.get('value')
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutException(f'Script did not finish within {timeout}s')
+            await asyncio.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+
+    @asynccontextmanager
+    async def open_new_tab(self, url, *, wait_timer=5, ready=(document_ready(),)):
+        """An async contextmanager opening a url in a new tab and waiting until it is ready.
+
+        Other tabs are worked on while this one loads.
+
+        :param url: the url to go to
+        :param wait_timer: how long to wait for the page to get ready at maximum
+        :param ready: conditions that have to be met before the page counts as loaded, see `conditions`
+        :return: the window handle of the tab
+        """
+        async with self._context_lock:
+            value = await self._command('POST', '/window/new', {'type': 'tab'})
+            handle = value['handle']
+            await self._command('POST', '/window', {'handle': handle})
+            await self._command('POST', '/url', {'url': url})
+        try:
+            await self.wait_until(handle, *ready, timeout=wait_timer)
+            yield handle
+        finally:
+            async with self._context_lock:
+                await self._command('POST', '/window', {'handle': handle})
+                await self._command('DELETE', '/window')
+
+    async def wait_until(self, handle, *conditions, timeout=5, poll_interval=0.05, max_poll_interval=1.0):
+        """A coroutine waiting until all conditions are met in a tab, polling with exponential backoff.
+
+        :param handle: the window handle of the tab
+        :param conditions: js snippets returning a bool, see `conditions`
+        :param timeout: how long to wait at maximum before raising a TimeoutException
+        """
+        deadline = monotonic() + timeout
+        pending = list(conditions)
+        while pending:
+            pending = [condition for condition in pending if not await self.execute(handle, condition)]
+            if not pending:
+                break
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutException(f'Page did not get ready within {timeout}s: {pending}')
+            await asyncio.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, max_poll_interval)
@@ -1,68 +1,163 @@
 # -*- coding: utf-8 -*-
 import os
 from contextlib import contextmanager
-from threading import RLock
-from time import sleep
+from time import sleep, monotonic
 
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.firefox.options import Options as DriverOptions
 
 from ..concurrent import ConcurrentProcessor
+from .conditions import document_ready
 from .task import _get
 from ..helpers import Singleton
 
 __all__ = [
-    'Driver'
+    'Driver',
+    'BrowserMixin',
+    'start_firefox',
 ]
 
 
-class Driver(ConcurrentProcessor, metaclass=Singleton):
-    """A basic wrapper class for a selenium driver"""
-    def __init__(self, *args, path=None, home_address=None, headless=False, **kwargs):
-        super(Driver, self).__init__(*args, **kwargs)
-        options = DriverOptions()
-        if headless:
-            options.add_argument('--headless')
-        self._logger.info('Starting Geckodriver...')
-        if path:
-            if os.name == 'nt' and not path.endswith('.exe'):
-                path += '.exe'
-            self._resource = webdriver.Firefox(firefox_options=options, executable_path=path)
-        else:
-            self._resource = webdriver.Firefox(firefox_options=options)
-        if home_address:
-            self.get(home_address)
+def start_firefox(*, path=None, headless=False):
+    """A function to start a new firefox instance through geckodriver.
 
-    def quit(self):
-        super(Driver, self).quit()
+    :param path: path to the geckodriver executable
+    :param headless: whether the browser should run without a window
+    :return: the started webdriver
+    """
+    options = DriverOptions()
+    if headless:
+        options.add_argument('--headless')
+    if path:
+        if os.name == 'nt' and not path.endswith('.exe'):
+            path += '.exe'
+        return webdriver.Firefox(firefox_options=options, executable_path=path)
+    else:
+        return webdriver.Firefox(firefox_options=options)
+
+
+class BrowserMixin:
+    """Browser handling shared by everything that wraps a selenium driver as its resource.
+
+    Expects `_resource`, `_lock`, `_logger`, `_path`, `_home_address` and `_headless` to be set by the class using
+    it.
+    """
+    pages_opened = 0
+
+    def is_healthy(self):
+        """A method to check whether the browser still responds.
+
+        :return: True if a trivial script could be run
+        """
+        try:
+            with self._lock:
+                return self._resource.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def start(self):
+        """A method to start the browser and point it at the home address."""
+        with self._lock:
+            self._logger.info('Starting Geckodriver...')
+            self._resource = start_firefox(path=self._path, headless=self._headless)
+            self.pages_opened = 0
+            if self._home_address:
+                self._resource.get(self._home_address)
+
+    def restart(self):
+        """A method to replace the browser by a fresh one."""
+        with self._lock:
+            self.close_browser()
+            self.start()
+
+    def recover(self, e):
+        """A method to recover from a failed task, restarting the browser if it crashed.
+
+        :param e: the exception the task failed with
+        """
+        if isinstance(e, WebDriverException) and not self.is_healthy():
+            self._logger.warning('Browser stopped responding, restarting...')
+            metrics = getattr(self, 'metrics', None)
+            if metrics is not None:
+                metrics.increment('browser_restarts')
+            self.restart()
+
+    def close_browser(self):
         with self._lock:
             try:
                 self._logger.info('Closing driver...')
-                self._driver.quit()
+                self._resource.quit()
             except Exception:
                 pass
 
-    def get(self, url: str):
-        """A threadsafe wrapper method for the standard get method of the webdriver.
-
-        :param url: url: the url to set the driver to
-        """
-        self.do(_get(url))
-
     @contextmanager
-    def open_new_tab(self, url: str, *, wait_timer: int = 5):
-        """A contextmanager to open a url in a new tab and wait for a given time before yielding control back to caller.
+    def open_new_tab(self, url: str, *, wait_timer: int = 5, ready=(document_ready(),)):
+        """A contextmanager to open a url in a new tab and wait until it is ready before yielding control back to caller.
 
         :param url: the url to go to
-        :param wait_timer: how long the driver should wait for the page to load
+        :param wait_timer: how long the driver should wait for the page to get ready at maximum
+        :param ready: conditions that have to be met before the page counts as loaded, see `conditions`
         """
         with self._lock:
             prev_window_handles = self._resource.window_handles
             self._resource.execute_script(f"window.open('{url}', '_blank')")
             current_window_handle = list(set(self._resource.window_handles) - set(prev_window_handles))[0]
-        sleep(wait_timer)
-        with self._lock:
-            self._resource.switch_to.window(current_window_handle)
-            yield
-            self._resource.close()
-            self._resource.switch_to.window(self._driver.window_handles[0])
+            self.pages_opened += 1
+        try:
+            self.wait_until(*ready, window_handle=current_window_handle, timeout=wait_timer)
+            with self._lock:
+                self._resource.switch_to.window(current_window_handle)
+                yield
+        finally:
+            with self._lock:
+                self._resource.switch_to.window(current_window_handle)
+                self._resource.close()
+                self._resource.switch_to.window(self._resource.window_handles[0])
+
+    def wait_until(self, *conditions, window_handle=None, timeout=5, poll_interval=0.05, max_poll_interval=1.0):
+        """A method to wait until all given conditions are met, polling them with exponential backoff.
+
+        The lock is only held while a condition is evaluated, so other tabs can be worked on in between.
+
+        :param conditions: js snippets returning a bool, see `conditions`
+        :param window_handle: the window to evaluate the conditions in, defaults to the current one
+        :param timeout: how long to wait at maximum before raising a TimeoutException
+        :param poll_interval: the initial delay between two polls
+        :param max_poll_interval: the ceiling of the delay between two polls
+        """
+        deadline = monotonic() + timeout
+        pending = list(conditions)
+        while pending:
+            with self._lock:
+                if window_handle is not None:
+                    self._resource.switch_to.window(window_handle)
+                pending = [condition for condition in pending if not self._resource.execute_script(condition)]
+            if not pending:
+                break
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutException(f'Page did not get ready within {timeout}s: {pending}')
+            sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+
+
+class Driver(BrowserMixin, ConcurrentProcessor, metaclass=Singleton):
+    """A basic wrapper class for a selenium driver"""
+    def __init__(self, *args, path=None, home_address=None, headless=False, **kwargs):
+        super(Driver, self).__init__(*args, **kwargs)
+        self._path = path
+        self._home_address = home_address
+        self._headless = headless
+        self.start()
+
+    def quit(self):
+        super(Driver, self).quit()
+        self.close_browser()
+
+    def get(self, url: str):
+        """A threadsafe wrapper method for the standard get method of the webdriver.
+
+        :param url: url: the url to set the driver to
+        """
+        self.do(_get(url))
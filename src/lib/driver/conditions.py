@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import json
+
+__all__ = [
+    'document_ready',
+    'css_selector',
+    'js_predicate',
+]
+
+
+def document_ready():
+    """A condition that is met once the document has finished loading.
+
+    :return: js snippet evaluating the condition
+    """
+    return "return document.readyState === 'complete';"
+
+
+def css_selector(selector):
+    """A condition that is met once an element matching a css selector exists.
+
+    :param selector: the css selector to look for
+    :return: js snippet evaluating the condition
+    """
+    return f"return document.querySelector({json.dumps(selector)}) !== null;"
+
+
+def js_predicate(expression):
+    """A condition that is met once a js expression is truthy, e.g. 'DB.db'.
+
+    :param expression: the js expression to evaluate
+    :return: js snippet evaluating the condition
+    """
+    return f"try {{ return !!({expression}); }} catch(e) {{ return false; }}"
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import logging
+from contextlib import contextmanager
+from queue import Queue
+from time import perf_counter
+
+from ..concurrent import ConcurrentProcessor, ToDo, InstrumentedLock, Metrics
+from .base import BrowserMixin
+
+__all__ = [
+    'DriverPool',
+    'PooledBrowser',
+]
+
+
+class PooledBrowser(BrowserMixin):
+    """A single browser instance of a DriverPool, handed to tasks in place of the driver."""
+    def __init__(self, number, *, path=None, home_address=None, headless=True, metrics=None, pool=None):
+        self._logger = logging.getLogger(f'{self.__class__.__qualname__}-{number}')
+        # the metrics of the pool, tasks and `recover` count retries and restarts on the browser they were handed
+        self.metrics = metrics or Metrics()
+        self._lock = InstrumentedLock(self.metrics, f'{self.__class__.__qualname__}-{number}')
+        self._path = path
+        self._home_address = home_address
+        self._headless = headless
+        self._pool = pool
+        self._resource = None
+        self.start()
+
+    def __getattr__(self, item):
+        return getattr(self._resource, item)
+
+    def offload(self, func, *args, name=None):
+        """Runs a CPU heavy function on the process pool of the DriverPool, see `ConcurrentProcessor.offload`."""
+        return self._pool.offload(func, *args, name=name)
+
+
+class DriverPool(ConcurrentProcessor):
+    """A processor dispatching every task to a free browser out of a pool of browser instances."""
+    def __init__(self, *, size=4, path=None, home_address=None, headless=True, recycle_after=50,
+                 lease_timeout=None, max_workers=None, process_workers=0):
+        super(DriverPool, self).__init__(max_workers=max_workers or size, process_workers=process_workers)
+        self._recycle_after = recycle_after
+        self._lease_timeout = lease_timeout
+        self._browsers = []
+        self._idle = Queue()
+        self._logger.info(f'Starting {size} browsers...')
+        for number in range(size):
+            browser = PooledBrowser(number, path=path, home_address=home_address, headless=headless,
+                                    metrics=self.metrics, pool=self)
+            self._browsers.append(browser)
+            self._idle.put(browser)
+
+    def quit(self):
+        super(DriverPool, self).quit()
+        for browser in self._browsers:
+            browser.close_browser()
+
+    @contextmanager
+    def lease(self):
+        """A contextmanager to lease a healthy browser from the pool and return it afterwards.
+
+        Browsers that stopped responding or opened more than `recycle_after` pages are restarted before being handed
+        out again.
+        """
+        start = perf_counter()
+        browser = self._idle.get(timeout=self._lease_timeout)
+        self.metrics.observe('browser_lease_seconds', perf_counter() - start)
+        try:
+            if browser.pages_opened >= self._recycle_after:
+                self.metrics.increment('browser_recycles')
+                self._logger.info(f'Recycling browser after {browser.pages_opened} pages...')
+                browser.restart()
+            elif not browser.is_healthy():
+                self._logger.warning('Browser failed health check, restarting...')
+                self.metrics.increment('browser_restarts')
+                browser.restart()
+            yield browser
+        finally:
+            self._idle.put(browser)
+
+    def _run_leased(self, task):
+        with self.lease() as browser:
+            return task(browser)
+
+    def _do(self, todo):
+        """A methode to submit a todo object to the worker pool, running it on the next free browser
+
+        :param todo: the todo to do
+        :return: the future of the todo
+        """
+        assert isinstance(todo, ToDo), 'Can only do ToDos...'
+        return self._submit(todo, self._run_leased, todo.task)
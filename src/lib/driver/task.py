@@ -1,27 +1,50 @@
 # -*- coding: utf-8 -*-
 from bs4 import BeautifulSoup
 
-from ..concurrent import make_task_factory
+from ..concurrent import make_task_factory, RetryPolicy
+from .conditions import document_ready
 
 
 __all__ = [
     'extract_soup',
+    'extract_soup_async',
 ]
 
 
-@make_task_factory
-def extract_soup(driver, url, *, wait_timer=5):
+@make_task_factory(retry=RetryPolicy(max_attempts=3, base_delay=2, deadline=5 * 60))
+def extract_soup(driver, url, *, wait_timer=5, ready=(document_ready(),), parse=None):
     """A Task to extract the html of a page, that waits for the js to load the data before extracting.
 
     :param driver: driver to operate on
     :param url: the url to get the data from
     :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
+    :param parse: module level function turning the html into compact data, e.g. a DataFrame, it is offloaded to
+                  the process pool of the driver instead of building the soup in the worker thread
+    :return: the extracted soup, or what parse returned
+    """
+    js_snippet = "return document.getElementsByTagName('html')[0].innerHTML"
+    with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready):
+        html = driver.execute_script(js_snippet)
+    if parse is not None:
+        return driver.offload(parse, html, name='parse').result()
+    return BeautifulSoup(html, 'html.parser')
+
+
+@make_task_factory
+async def extract_soup_async(driver, url, *, wait_timer=5, ready=(document_ready(),)):
+    """The AsyncDriver version of `extract_soup`.
+
+    :param driver: the AsyncDriver to operate on
+    :param url: the url to get the data from
+    :param wait_timer: how long the driver should wait for at maximum
+    :param ready: conditions that have to be met before the page counts as loaded
     :return: the extracted soup
     """
     js_snippet = "return document.getElementsByTagName('html')[0].innerHTML"
-    with driver.open_new_tab(url, wait_timer=wait_timer):
-        soup = BeautifulSoup(driver.execute_script(js_snippet), 'html.parser')
-    return soup
+    async with driver.open_new_tab(url, wait_timer=wait_timer, ready=ready) as tab:
+        html = await driver.execute(tab, js_snippet)
+    return BeautifulSoup(html, 'html.parser')
 
 
 @make_task_factory
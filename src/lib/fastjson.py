@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import json
+
+__all__ = [
+    'loads',
+    'frame_from_json',
+    'frame_from_ndjson',
+    'JSON_BACKEND',
+]
+
+
+try:
+    import orjson as _backend
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    try:
+        import ujson as _backend
+        JSON_BACKEND = 'ujson'
+    except ImportError:
+        _backend = json
+        JSON_BACKEND = 'json'
+
+
+def loads(payload):
+    """A function to decode a json document with the fastest installed json library.
+
+    :param payload: str or bytes
+    :return: the decoded document
+    """
+    return _backend.loads(payload)
+
+
+def frame_from_json(payload):
+    """A function to build a DataFrame out of a single json document in one decode call.
+
+    The document is either columnar, i.e. an object mapping column names to equally long value arrays, which is
+    turned into columns directly, or an array of records.
+
+    :param payload: str or bytes
+    :return: the DataFrame
+    """
+    import pandas as pd
+
+    data = loads(payload)
+    if isinstance(data, dict):
+        return pd.DataFrame(data)
+    return pd.DataFrame.from_records(data) if data else pd.DataFrame()
+
+
+def frame_from_ndjson(payload):
+    """A function to build a DataFrame out of newline delimited json records.
+
+    :param payload: str or bytes
+    :return: the DataFrame
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8')
+    return frame_from_json('[' + ','.join(line for line in payload.splitlines() if line.strip()) + ']')
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import gzip
+import zlib
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from threading import local
+from urllib.parse import urljoin, urlsplit
+
+from .concurrent import ConcurrentProcessor
+from .fastjson import loads
+
+__all__ = [
+    'HttpFetcher',
+]
+
+
+class HttpFetcher(ConcurrentProcessor):
+    """A lightweight processor fetching data over plain http, keeping one keep-alive connection per host and thread."""
+    def __init__(self, *args, home_address=None, headers=None, timeout=30, **kwargs):
+        super(HttpFetcher, self).__init__(*args, **kwargs)
+        self._home_address = home_address
+        self._timeout = timeout
+        self._headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'User-Agent': 'STB-Liga-export',
+        }
+        self._headers.update(headers or {})
+        self._local = local()
+        self._connections = []
+
+    def quit(self):
+        super(HttpFetcher, self).quit()
+        with self._lock:
+            self._logger.info('Closing connections...')
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        if (scheme, netloc) not in connections:
+            connection_cls = HTTPSConnection if scheme == 'https' else HTTPConnection
+            connection = connection_cls(netloc, timeout=self._timeout)
+            connections[(scheme, netloc)] = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connections[(scheme, netloc)]
+
+    def request(self, url, *, method='GET', headers=None, body=None):
+        """A method to send a request over the pooled connection of the current thread.
+
+        :param url: the url to request, relative urls are resolved against the home address
+        :param method: the http method
+        :param headers: additional headers
+        :param body: the request body
+        :return: tuple of status, response headers and the decoded body bytes
+        """
+        url = urljoin(self._home_address, url) if self._home_address else url
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        all_headers = dict(self._headers, **(headers or {}))
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request(method, path, body=body, headers=all_headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (HTTPException, ConnectionError):
+                # the server closed the kept alive connection, reconnect once
+                connection.close()
+                if attempt:
+                    raise
+        encoding = response.getheader('Content-Encoding', '')
+        if encoding == 'gzip':
+            data = gzip.decompress(data)
+        elif encoding == 'deflate':
+            data = zlib.decompress(data)
+        self._logger.debug(f'{method} {url} -> {response.status} ({len(data)} bytes)')
+        return response.status, dict(response.getheaders()), data
+
+    def get_json(self, url, **kwargs):
+        """A method to get and decode a json document.
+
+        :param url: the url to request
+        :return: the decoded document
+        """
+        status, _, data = self.request(url, **kwargs)
+        if status >= 400:
+            raise HTTPException(f'GET {url} failed with status {status}')
+        return loads(data)
+
+    def validator(self, url):
+        """A method to get what identifies the current version of a resource, i.e. its ETag or Last-Modified header.
+
+        :param url: the url to check
+        :return: the validator or None if the server sends neither
+        """
+        _, headers, _ = self.request(url, method='HEAD')
+        headers = {key.lower(): value for key, value in headers.items()}
+        return headers.get('etag') or headers.get('last-modified')
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Event, RLock
+from time import monotonic
+from typing import NamedTuple, Optional
+
+__all__ = [
+    'Job',
+    'JobRunner',
+    'JobCancelled',
+    'Progress',
+]
+
+
+Progress = NamedTuple('Progress', [('done', int), ('total', int), ('rows', int), ('eta', Optional[float]),
+                                   ('message', str)])
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """A unit of background work that can report progress and be cancelled."""
+    def __init__(self, name, func, runner, *, on_done=None, on_error=None, on_progress=None, on_cancelled=None):
+        self.name = name
+        self.logger = logging.getLogger(f'Job<{name}>')
+        self._func = func
+        self._runner = runner
+        self._cancelled = Event()
+        self._started_at = None
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """A method to ask the job to stop, it does so at its next cancellation point and then posts on_cancelled."""
+        self.logger.info('Cancelling...')
+        self._cancelled.set()
+
+    def check(self):
+        """A method to raise JobCancelled if the job got cancelled, to be called between steps of the work."""
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    def report(self, done, total, rows=0, message=''):
+        """A method to report progress from the worker thread, also acting as cancellation point.
+
+        :param done: how many steps are done
+        :param total: how many steps there are
+        :param rows: how many rows were fetched so far
+        :param message: a message to show
+        """
+        self.check()
+        elapsed = monotonic() - self._started_at
+        eta = elapsed / done * (total - done) if done else None
+        self._runner.post(self.on_progress, Progress(done, total, rows, eta, message))
+
+    def __call__(self):
+        self._started_at = monotonic()
+        try:
+            result = self._func(self)
+        except JobCancelled:
+            self.logger.info('Cancelled')
+            self._runner.post(self.on_cancelled)
+        except Exception as e:
+            self.logger.exception('Failed')
+            self._runner.post(self.on_error, e)
+        else:
+            self._runner.post(self.on_done, result)
+
+
+class JobRunner:
+    """Runs jobs on background threads and hands their results back to the Tk main thread.
+
+    Callbacks of the jobs are only ever called from `poll`, which reschedules itself via `after`.
+    """
+    def __init__(self, *, max_workers=2):
+        self._logger = logging.getLogger(self.__class__.__qualname__)
+        self._worker_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._queue = Queue()
+        self._lock = RLock()
+        self._jobs = set()
+
+    def submit(self, name, func, **callbacks):
+        """A method to start a job.
+
+        :param name: name of the job
+        :param func: callable taking the job, running off the main thread
+        :param callbacks: on_done, on_error, on_progress and on_cancelled, called on the main thread
+        :return: the Job
+        """
+        job = Job(name, func, self, **callbacks)
+        with self._lock:
+            self._jobs.add(job)
+        fut = self._worker_pool.submit(job)
+        fut.add_done_callback(lambda _: self._forget(job))
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            self._jobs.discard(job)
+
+    def post(self, callback, *args):
+        """A method to queue a callback to be called on the main thread."""
+        if callback is not None:
+            self._queue.put((callback, args))
+
+    def poll(self, widget, *, interval=100):
+        """A method to run all queued callbacks and schedule the next poll on a Tk widget.
+
+        :param widget: the widget to schedule on
+        :param interval: ms between two polls
+        """
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                self._logger.exception(f'Callback {callback} failed')
+        widget.after(interval, self.poll, widget)
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs:
+                job.cancel()
+        self._worker_pool.shutdown(wait=False)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+import pandas as pd
+from sqlalchemy import tuple_
+
+from .aggregates import refresh_aggregates_for
+from .mapping import to_model_frames
+from .models import League, Team, Gymnast, Standoff, Routine
+
+__all__ = [
+    'load_dataframes',
+    'load_dataframe',
+    'load_cleaned_dump',
+    'STB_DB_MODEL_MAP',
+]
+
+
+# ordered so that referenced tables are loaded before the tables referencing them
+STB_DB_MODEL_MAP = OrderedDict([
+    ('leagues', League),
+    ('teams', Team),
+    ('gymnasts', Gymnast),
+    ('standoffs', Standoff),
+    ('routines', Routine),
+])
+
+
+def load_cleaned_dump(fut, *, db, batch_size=10000, refresh_aggregates=True):
+    """A callback to load the cleaned tables of a future into the database.
+
+    :param fut: future holding a dict of DataFrames keyed by store or table name
+    :param db: the database to load into
+    :param batch_size: how many rows to send per executemany
+    :param refresh_aggregates: whether to refresh the aggregates affected by the loaded rows
+    :return: dict with the amount of rows loaded per table
+    """
+    dfs = to_model_frames(fut.result())
+    ret = load_dataframes(db, dfs, batch_size=batch_size)
+    if refresh_aggregates:
+        refresh_aggregates_for(db, dfs)
+    return ret
+
+
+def load_dataframes(db, dfs, *, batch_size=10000, sync_marks=None):
+    """A function to load DataFrames into their models in a single transaction.
+
+    Cleaned indexdb stores are mapped onto the models first, see `to_model_frames`, frames keyed by a models table
+    name are loaded as they are. Anything else is ignored.
+
+    :param db: the database to load into
+    :param dfs: dict of DataFrames keyed by store name, e.g. 'begegnung', or table name, e.g. 'routines'
+    :param batch_size: how many rows to send per executemany
+    :param sync_marks: chunk marks of an incremental sync keyed by source and store, see `SyncResult`, they are
+                       committed together with the rows
+    :return: dict with the amount of rows loaded per table
+    """
+    dfs = to_model_frames(dfs)
+    with db.get_session() as session:
+        ret = {name: _load_dataframe(db, session, model, dfs[name], batch_size)
+               for name, model in STB_DB_MODEL_MAP.items() if name in dfs}
+        for (source, store), chunks in (sync_marks or {}).items():
+            db.set_sync_chunks(store, chunks, source=source, session=session)
+    return ret
+
+
+def load_dataframe(db, model, df, *, batch_size=10000):
+    """A function to upsert a DataFrame into the table of a model in a single transaction.
+
+    Rows are sent in batches through executemany, rows whose primary key already exists are replaced. Columns that
+    the model doesn't declare are dropped.
+
+    :param db: the database to load into
+    :param model: the model to load into
+    :param df: the DataFrame to load
+    :param batch_size: how many rows to send per executemany
+    :return: the amount of rows loaded
+    """
+    with db.get_session() as session:
+        return _load_dataframe(db, session, model, df, batch_size)
+
+
+def _load_dataframe(db, session, model, df, batch_size):
+    table = model.__table__
+    columns = [column.name for column in table.columns if column.name in df.columns]
+    if df.empty or not columns:
+        return 0
+    df = df[columns]
+    records = df.astype(object).where(pd.notnull(df), None).to_dict('records')
+    statement = _upsert(table, session.bind.dialect.name)
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        if statement is None:
+            _delete_existing(session, table, batch)
+            session.execute(table.insert(), batch)
+        else:
+            session.execute(statement, batch)
+    db.logger.info(f'Loaded {len(records)} rows into {table.name}')
+    return len(records)
+
+
+def _upsert(table, dialect):
+    if dialect == 'sqlite':
+        return table.insert().prefix_with('OR REPLACE')
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key.columns],
+            set_={column.name: statement.excluded[column.name]
+                  for column in table.columns if not column.primary_key},
+        )
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        return statement.on_duplicate_key_update(
+            {column.name: statement.inserted[column.name] for column in table.columns if not column.primary_key})
+    # other databases get the existing rows deleted before a plain insert, see `_delete_existing`
+    return None
+
+
+def _delete_existing(session, table, records):
+    keys = list(table.primary_key.columns)
+    if len(keys) == 1:
+        condition = keys[0].in_([record[keys[0].name] for record in records])
+    else:
+        condition = tuple_(*keys).in_([tuple(record[key.name] for key in keys) for record in records])
+    session.execute(table.delete().where(condition))
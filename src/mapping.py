@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import OrderedDict
+from typing import NamedTuple, Dict, Tuple, Callable, Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, Float, Date, Enum
+
+from .models import League, Team, Gymnast, Standoff, Routine
+
+__all__ = [
+    'StoreMapping',
+    'STB_DB_STORE_MAP',
+    'to_model_frames',
+]
+
+
+logger = logging.getLogger('Mapping')
+
+
+class StoreMapping(NamedTuple):
+    """Where the columns of a model come from.
+
+    The store is an indexdb store, or a column of one holding lists of records, e.g. 'begegnung.wertungen', whose
+    records get the id of their parent as '<store>_id'. Every model column names the store fields it may come from,
+    the first one present is used. Columns the store has none of the fields of can be derived from the other model
+    columns instead.
+    """
+    model: Any
+    store: str
+    fields: Dict[str, Tuple[str, ...]]
+    derived: Dict[str, Callable[[pd.DataFrame], pd.Series]] = {}
+
+
+# The field layout of the stores is defined by the site, these are the fields it is known to use.
+# Ordered so that referenced tables are mapped and loaded before the tables referencing them.
+STB_DB_STORE_MAP = OrderedDict([
+    ('leagues', StoreMapping(League, 'tabelle', {
+        'id': ('id',),
+        'name': ('name', 'bezeichnung'),
+        'level': ('ebene', 'liga', 'name', 'bezeichnung'),
+    })),
+    ('teams', StoreMapping(Team, 'mannschaft', {
+        'id': ('id',),
+        'name': ('name',),
+        'league_id': ('tabelle_id', 'liga_id'),
+    })),
+    ('gymnasts', StoreMapping(Gymnast, 'person', {
+        'id': ('id',),
+        'firs_tname': ('vorname',),
+        'last_name': ('nachname', 'name'),
+        'team_id': ('mannschaft_id',),
+    })),
+    ('standoffs', StoreMapping(Standoff, 'begegnung', {
+        'id': ('id',),
+        'timestamp': ('datum',),
+        'season': ('saison',),
+        'location': ('halle.name', 'halle', 'ort'),
+        'host_id': ('heim_id',),
+        'guest_id': ('gast_id',),
+    }, {
+        # a season lies within one calendar year
+        'season': lambda df: pd.to_datetime(df['timestamp']).dt.year,
+    })),
+    ('routines', StoreMapping(Routine, 'begegnung.wertungen', {
+        'id': ('id',),
+        'E': ('e', 'E'),
+        'D': ('d', 'D'),
+        'event': ('geraet',),
+        'gymnast_id': ('person_id',),
+        'standoff_id': ('begegnung_id',),
+    })),
+])
+
+
+def to_model_frames(dfs):
+    """A function to turn cleaned indexdb stores into DataFrames of the models, keyed by the models table names.
+
+    Frames already keyed by a models table name are passed on as they are, stores no model is mapped to are left out.
+    Rows missing a value of a column the model requires are dropped.
+
+    :param dfs: dict of cleaned DataFrames keyed by store name, e.g. 'begegnung'
+    :return: dict of DataFrames keyed by table name, e.g. 'standoffs'
+    """
+    ret = OrderedDict()
+    for name, mapping in STB_DB_STORE_MAP.items():
+        if name in dfs:
+            ret[name] = dfs[name]
+            continue
+        store = _store_frame(dfs, mapping.store)
+        if store is not None and not store.empty:
+            df = _map_store(store, mapping)
+            if df is not None:
+                ret[name] = df
+    return ret
+
+
+def _store_frame(dfs, store):
+    """Gets a store, or the records of a column of a store holding lists of records."""
+    parent, _, column = store.partition('.')
+    df = dfs.get(parent)
+    if df is None or not column:
+        return df
+    if column not in df or 'id' not in df:
+        return None
+    lists = df.set_index('id')[column].dropna()
+    lists = lists[lists.map(lambda value: isinstance(value, list))].explode().dropna()
+    records = pd.json_normalize(lists.tolist(), sep='.')
+    records[f'{parent}_id'] = lists.index.to_numpy()
+    if 'id' not in records:
+        # records without an id of their own are numbered within their parent
+        records['id'] = records[f'{parent}_id'].astype('int64') * 1000 + records.groupby(f'{parent}_id').cumcount()
+    return records
+
+
+def _map_store(store, mapping):
+    """Picks and converts the model columns out of a store, returns None if it lacks a required column."""
+    table = mapping.model.__table__
+    columns = OrderedDict()
+    derived = []
+    for column in table.columns:
+        field = next((field for field in mapping.fields.get(column.name, ()) if field in store), None)
+        if field is None:
+            if column.name in mapping.derived:
+                derived.append(column)
+            elif not column.nullable:
+                logger.warning(f"Store '{mapping.store}' has none of the fields {mapping.fields.get(column.name)} "
+                               f"of {table.name}.{column.name}, skipping it.")
+                return None
+            continue
+        columns[column.name] = _convert(store[field], column.type)
+    df = pd.DataFrame(columns)
+    for column in derived:
+        df[column.name] = _convert(mapping.derived[column.name](df), column.type)
+    required = [column.name for column in table.columns if not column.nullable and column.name in df]
+    complete = df[required].notna().all(axis=1)
+    if not complete.all():
+        logger.warning(f'Dropped {(~complete).sum()} rows of {table.name} lacking one of {required}')
+        df = df[complete]
+    return df.reset_index(drop=True)
+
+
+def _convert(series, column_type):
+    """Converts a store column to the type of a model column, values that don't convert become null."""
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        return _enum_names(series, column_type.enum_class)
+    elif isinstance(column_type, Integer):
+        return pd.to_numeric(series, errors='coerce').astype('Int64')
+    elif isinstance(column_type, Float):
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    elif isinstance(column_type, Date):
+        return pd.to_datetime(series, errors='coerce').dt.date.astype(object)
+    return series.astype(object).where(series.notna(), None).map(lambda value: value if value is None else str(value))
+
+
+def _enum_names(series, enum_class):
+    """Maps store values onto enum names by prefix, e.g. 'Verbandsliga Nord' to 'VERBANDS' or 'Boden' to 'BODEN'."""
+    names = sorted((member.name for member in enum_class), key=len, reverse=True)
+
+    def name(value):
+        if isinstance(value, enum_class):
+            return value.name
+        text = str(value).upper().replace(' ', '')
+        return next((name for name in names if text.startswith(name)), np.nan)
+
+    return series.astype(object).map(name, na_action='ignore')
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import enum
+import json
 
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Date, Float
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Date, Float, Index
 from sqlalchemy.orm import relationship
 
 from .lib import DB
+from .stores import STB_DB_STORES
 
 __all__ = [
     'STBDB',
@@ -13,11 +15,48 @@ __all__ = [
     'Gymnast',
     'Standoff',
     'Routine',
+    'SyncChunk',
+    'LeagueTableRow',
+    'GymnastEventStat',
 ]
 
 
 class STBDB(DB):
-    DEFAULT_INDEXDB_TABLES = ('person', 'mannschaft', 'tabelle', 'verein', 'halle', 'saison', 'cache', 'begegnung')
+    DEFAULT_INDEXDB_TABLES = STB_DB_STORES
+
+    def get_sync_chunks(self, store, *, source=''):
+        """A method to get the chunk marks of the last incremental sync of an indexdb store.
+
+        :param store: the indexdb store
+        :param source: the page the store was synced from
+        :return: list of dicts with the keys first, last and digest, ordered by key
+        """
+        table = SyncChunk.__table__
+        with self.get_session() as session:
+            rows = session.execute(table.select().where((table.c.source == source) & (table.c.store == store))
+                                   .order_by(table.c.chunk)).fetchall()
+        return [{'first': json.loads(row.first_key), 'last': json.loads(row.last_key), 'digest': row.digest}
+                for row in rows]
+
+    def set_sync_chunks(self, store, chunks, *, source='', session=None):
+        """A method to replace the chunk marks of an indexdb store.
+
+        :param store: the indexdb store
+        :param chunks: list of dicts with the keys first, last and digest, ordered by key
+        :param source: the page the store was synced from
+        :param session: the session to write them in, so they are committed together with the synced rows
+        """
+        if session is None:
+            with self.get_session() as session:
+                return self.set_sync_chunks(store, chunks, source=source, session=session)
+        table = SyncChunk.__table__
+        session.execute(table.delete().where((table.c.source == source) & (table.c.store == store)))
+        if chunks:
+            session.execute(table.insert(), [
+                {'source': source, 'store': store, 'chunk': i, 'first_key': json.dumps(chunk['first']),
+                 'last_key': json.dumps(chunk['last']), 'digest': chunk['digest']}
+                for i, chunk in enumerate(chunks)
+            ])
 
 
 class League(DB.Model):
@@ -41,7 +80,7 @@ class Team(DB.Model):
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False, index=True)
     league = relationship('League', back_populates='teams')
 
 
@@ -51,7 +90,7 @@ class Gymnast(DB.Model):
     id = Column(Integer, primary_key=True)
     firs_tname = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False, index=True)
     team = relationship('Team', back_populates='gymnasts')
 
 
@@ -60,10 +99,11 @@ class Standoff(DB.Model):
 
     id = Column(Integer, primary_key=True)
     timestamp = Column(Date, nullable=False)
+    season = Column(Integer, nullable=False, index=True)
     location = Column(String, nullable=False)
-    host_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
+    host_id = Column(Integer, ForeignKey('teams.id'), nullable=False, index=True)
     host = relationship('Team', back_populates='standoffs')
-    guest_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
+    guest_id = Column(Integer, ForeignKey('teams.id'), nullable=False, index=True)
     guest = relationship('Team', back_populates='standoffs')
 
 
@@ -82,12 +122,58 @@ class Routine(DB.Model):
     id = Column(Integer, primary_key=True)
     E = Column(Float, nullable=False)
     D = Column(Float, nullable=False)
-    event = Column(Enum(Event), nullable=False)
-    gymnast_id = Column(Integer, ForeignKey('gymnasts.id'), nullable=False)
+    event = Column(Enum(Event), nullable=False, index=True)
+    gymnast_id = Column(Integer, ForeignKey('gymnasts.id'), nullable=False, index=True)
     gymnast = relationship('Gymnast', back_populates='routines')
-    standoff_id = Column(Integer, ForeignKey('standoffs.id'), nullable=False)
+    standoff_id = Column(Integer, ForeignKey('standoffs.id'), nullable=False, index=True)
     standoff = relationship('Standoff', back_populates='routines')
 
     @property
     def total(self):
         return 10 + self.D - self.E
+
+
+
+class SyncChunk(DB.Model):
+    __tablename__ = 'sync_chunks'
+
+    source = Column(String, primary_key=True)
+    store = Column(String, primary_key=True)
+    chunk = Column(Integer, primary_key=True)
+    first_key = Column(String, nullable=False)
+    last_key = Column(String, nullable=False)
+    digest = Column(String, nullable=False)
+
+
+class LeagueTableRow(DB.Model):
+    __tablename__ = 'league_tables'
+    __table_args__ = (
+        Index('ix_league_tables_league_id_season_rank', 'league_id', 'season', 'rank'),
+    )
+
+    league_id = Column(Integer, ForeignKey('leagues.id'), primary_key=True)
+    season = Column(Integer, primary_key=True)
+    team_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    rank = Column(Integer, nullable=False)
+    standoffs = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)
+    draws = Column(Integer, nullable=False)
+    losses = Column(Integer, nullable=False)
+    points = Column(Integer, nullable=False)
+    score_for = Column(Float, nullable=False)
+    score_against = Column(Float, nullable=False)
+
+
+class GymnastEventStat(DB.Model):
+    __tablename__ = 'gymnast_event_stats'
+    __table_args__ = (
+        Index('ix_gymnast_event_stats_event_season_best', 'event', 'season', 'best'),
+    )
+
+    gymnast_id = Column(Integer, ForeignKey('gymnasts.id'), primary_key=True)
+    season = Column(Integer, primary_key=True)
+    event = Column(Enum(Routine.Event), primary_key=True)
+    team_id = Column(Integer, ForeignKey('teams.id'), nullable=False, index=True)
+    average = Column(Float, nullable=False)
+    best = Column(Float, nullable=False)
+    routines = Column(Integer, nullable=False)
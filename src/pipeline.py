@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from functools import partial
+
+from .driver import extract_index_db
+from .lib.concurrent import TaskGraph
+from .processing import STB_DB_CLEANUP_MAP
+
+__all__ = [
+    'build_sync_graph',
+]
+
+
+def build_sync_graph(url, tables, db, *, top_n=3, processor=None):
+    """A function to build the graph of a full sync, so extraction, cleanup and loading overlap.
+
+    Every table is extracted in its own tab and cleaned as soon as it arrives. The load waits for all cleanups.
+
+    :param url: the url to extract from
+    :param tables: the indexdb tables to extract
+    :param db: the database to load into
+    :param top_n: how many of the best routines per team and event count for the aggregates
+    :param processor: the ConcurrentProcessor the graph is run on, if given cleanup and aggregation are offloaded
+                      to its process pool
+    :return: the TaskGraph, its 'load' node returns the loaded row counts
+    """
+    graph = TaskGraph()
+    for table in tables:
+        graph.add(f'extract:{table}', extract_index_db(url, [table], mode='async'))
+        graph.add(f'cleanup:{table}', partial(_cleanup, table), depends_on=[f'extract:{table}'],
+                  offload=processor is not None)
+    graph.add('load', partial(_load, db, list(tables), top_n, processor),
+              depends_on=[f'cleanup:{table}' for table in tables])
+    return graph
+
+
+def _cleanup(table, dfs):
+    return STB_DB_CLEANUP_MAP[table](dfs[table])
+
+
+def _load(db, tables, top_n, processor, *dfs):
+    from .mapping import to_model_frames
+    from .loading import load_dataframes
+    from .aggregates import refresh_aggregates_for
+
+    models = to_model_frames(dict(zip(tables, dfs)))
+    loaded = load_dataframes(db, models)
+    refresh_aggregates_for(db, models, top_n=top_n, processor=processor)
+    return loaded
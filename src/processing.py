@@ -1,50 +1,161 @@
 # -*- coding: utf-8 -*-
+import logging
+import re
+from typing import NamedTuple, Dict, Tuple
+
 import pandas as pd
 import numpy as np
+from pandas.api.types import infer_dtype
 
 __all__ = [
     'cleanup_indexdb_dump',
+    'cleanup_table',
+    'TableSchema',
+    'STB_DB_SCHEMAS',
     'STB_DB_CLEANUP_MAP',
 ]
 
 
-def cleanup_indexdb_dump(fut, *, cleanup_functions={}):
+logger = logging.getLogger('Cleanup')
+
+
+class TableSchema(NamedTuple):
+    """Declared types of the columns of an indexdb store, columns not mentioned are typed by inference."""
+    dtypes: Dict[str, str] = {}
+    dates: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
+    # string columns whose name matches are parsed as dates
+    date_pattern: str = r'(datum|date|zeit|time|_at$)'
+    # object columns with at most this ratio of unique values become categoricals
+    category_ratio: float = 0.5
+
+
+def cleanup_indexdb_dump(fut, *, cleanup_functions={}, processor=None):
     data = fut.result()
-    assert data.keys() == cleanup_functions.keys(), "Cleanup functions didn't mach the extracted data set."
-    ret = {key: cleanup_functions[key](item) for key, item in data.items()}
-    print(ret)
+    assert data.keys() <= cleanup_functions.keys(), "Cleanup functions didn't mach the extracted data set."
+    if processor is None:
+        return {key: cleanup_functions[key](item) for key, item in data.items()}
+    # the tables are cleaned side by side on the process pool of the processor
+    futs = {key: processor.offload(cleanup_functions[key], item, name=f'cleanup:{key}') for key, item in data.items()}
+    return {key: fut.result() for key, fut in futs.items()}
+
+
+def cleanup_table(df, schema=TableSchema()):
+    """A function to turn a raw indexdb dump into a compactly typed DataFrame.
+
+    Nested json objects are flattened into dotted columns, declared dtypes and dates are applied, repeated strings
+    become categoricals, numbers are downcast and remaining date like string columns are parsed. The given DataFrame
+    is left as it is.
+
+    :param df: the raw DataFrame with one json record per row
+    :param schema: the TableSchema of the store
+    :return: the typed DataFrame
+    """
+    if df.empty:
+        return df
+    size = df.memory_usage(deep=True).sum()
+    # columns are only ever replaced, never changed in place, so a shallow copy keeps the callers frame untouched
+    df = _flatten(df.copy(deep=False))
+    for column, dtype in schema.dtypes.items():
+        if column in df:
+            # declared numbers that don't parse become null instead of failing the whole store
+            values = pd.to_numeric(df[column], errors='coerce') if pd.api.types.is_numeric_dtype(dtype) else df[column]
+            df[column] = values.astype(dtype)
+    date_pattern = re.compile(schema.date_pattern, re.IGNORECASE)
+    for column in df.columns:
+        kind = infer_dtype(df[column], skipna=True)
+        if column in schema.dtypes:
+            continue
+        elif column in schema.dates or (date_pattern.search(str(column)) and kind == 'string'):
+            # only declared integer columns are epoch milliseconds, e.g. an integer 'spielzeit' is a season
+            df[column] = pd.to_datetime(df[column], errors='coerce', unit='ms' if kind == 'integer' else None)
+        elif kind == 'string' and (column in schema.categories or
+                                   df[column].nunique() <= schema.category_ratio * len(df)):
+            df[column] = df[column].astype('category')
+        elif kind == 'integer' and df[column].dtype.kind in 'iu':
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        elif kind == 'floating' and df[column].dtype == np.float64:
+            df[column] = _downcast_float(df[column])
+        elif kind in ('integer', 'mixed-integer-float') and df[column].dtype == object:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        elif kind == 'boolean' and df[column].dtype == object:
+            df[column] = df[column].astype('boolean')
+    logger.debug(f'Cleaned table from {size} to {df.memory_usage(deep=True).sum()} bytes')
+    return df
+
+
+def _downcast_float(series):
+    """Downcast to float32 if every value survives the round trip, so no score loses digits, e.g. 8.2 stays float64."""
+    downcast = series.astype(np.float32)
+    if np.array_equal(downcast.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return downcast
+    return series
+
+
+def _flatten(df):
+    """Flatten columns holding json objects into one column per (nested) key, e.g. 'halle.name'."""
+    nested = [column for column in df.columns[(df.dtypes == object).to_numpy()]
+              if infer_dtype(df[column], skipna=True) == 'mixed'
+              and isinstance(df[column].dropna().iloc[0] if df[column].notna().any() else None, dict)]
+    if not nested:
+        return df
+    parts = [df.drop(columns=nested)]
+    for column in nested:
+        values = df[column].where(df[column].map(lambda value: isinstance(value, dict)), None)
+        flat = pd.json_normalize([value or {} for value in values.tolist()], sep='.')
+        flat.columns = [f'{column}.{key}' for key in flat.columns]
+        flat.index = df.index
+        parts.append(flat)
+    return pd.concat(parts, axis=1)
+
+
+# The field layout of the stores is defined by the site, so only what is known is declared here,
+# everything else is typed by cleanup_table's inference rules.
+STB_DB_SCHEMAS = {
+    'begegnung': TableSchema(
+        dtypes={'id': 'Int32', 'saison': 'Int16', 'heim_id': 'Int32', 'gast_id': 'Int32'},
+        dates=('datum',),
+    ),
+    'person': TableSchema(dtypes={'id': 'Int32', 'mannschaft_id': 'Int32'}),
+    'mannschaft': TableSchema(dtypes={'id': 'Int32', 'tabelle_id': 'Int32', 'verein_id': 'Int32'}),
+    'tabelle': TableSchema(dtypes={'id': 'Int32'}),
+    'verein': TableSchema(),
+    'halle': TableSchema(),
+    'saison': TableSchema(),
+    'cache': TableSchema(category_ratio=0),
+}
 
 
 def _cleanup_begegnung(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['begegnung'])
 
 
 def _cleanup_person(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['person'])
 
 
 def _cleanup_mannschaft(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['mannschaft'])
 
 
 def _cleanup_tabelle(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['tabelle'])
 
 
 def _cleanup_verein(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['verein'])
 
 
 def _cleanup_halle(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['halle'])
 
 
 def _cleanup_saison(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['saison'])
 
 
 def _cleanup_cache(df):
-    return df
+    return cleanup_table(df, STB_DB_SCHEMAS['cache'])
 
 
 STB_DB_CLEANUP_MAP = {
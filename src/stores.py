@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+__all__ = [
+    'STB_DB_STORES',
+]
+
+
+# the indexdb stores of kutu.stb-liga.de, kept free of heavy imports so the cli can build its parser right away
+STB_DB_STORES = ('person', 'mannschaft', 'tabelle', 'verein', 'halle', 'saison', 'cache', 'begegnung')
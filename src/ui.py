@@ -4,27 +4,21 @@ import logging.config
 
 import os
 import sys
+from time import perf_counter
 from enum import Enum, unique
 from collections import namedtuple
+from threading import RLock
 
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import filedialog
 
 
-from .models import STBDB
-# from .processing import cleanup_indexdb_dump, STB_DB_CLEANUP_MAP
-from .driver import STBDriver  # , extract_index_db
+from .lib.jobs import JobRunner
 
 project_dir = os.path.dirname(os.path.dirname(__file__))
 
 
-def dfs_to_csv(fut):
-    dfs = fut.result()
-    for key, df in dfs.items():
-        df.to_csv(os.path.join(project_dir, 'exports/' + key + '.csv'), encoding='utf-8', index=True)
-
-
 Font = namedtuple('Font', ['type', 'size'])
 
 
@@ -54,6 +48,16 @@ class Tab(tk.Frame):
 
 class ExportTab(Tab):
     def create_widgets(self):
+        sync_button = ttk.Button(self, text='Daten synchronisieren', command=self.parent.start_sync)
+        sync_button.grid(row=0, column=1)
+        cancel_button = ttk.Button(self, text='Abbrechen', command=self.parent.cancel_sync)
+        cancel_button.grid(row=0, column=2)
+        self.progress_bar = ttk.Progressbar(self, mode='determinate')
+        self.progress_bar.grid(row=3, column=1, columnspan=2, sticky='we')
+        self.status = tk.StringVar(value='Bereit')
+        status_label = ttk.Label(self, textvariable=self.status)
+        status_label.grid(row=4, column=1, columnspan=2, sticky='w')
+
         file_path = tk.StringVar()
         selected_file_label = tk.Entry(self, textvariable=file_path, state="readonly")
         selected_file_label.grid(row=1, column=1)
@@ -62,7 +66,7 @@ class ExportTab(Tab):
                              command=lambda: STBApp.ask_saveasfilename(file_path, ('Excel Datei', "*.xlsx")))
         file_picker_button.grid(row=1, column=2)
         export_button = ttk.Button(self, text='Daten als excel datei speichern',
-                        command=lambda: self.logger.debug('export button pressed <ADD ACTION>'))
+                        command=lambda: self.parent.start_export(file_path.get()))
         export_button.grid(row=2, column=1)
 
 
@@ -79,18 +83,109 @@ class STBApp(tk.Tk):
         self.resizable(False, False)
         self.logger = logging.getLogger('STB_App')
 
-        self.logger.info('Creating database...')
-        self.db = STBDB()
-
-        self.logger.info('Starting driver...')
-        driver_path = os.path.join(project_dir, 'drivers/geckodriver.exe')
-        self.driver = STBDriver(path=driver_path, headless=True)
-
-        # self.driver.do(extract_index_db('https://kutu.stb-liga.de', STBDB.DEFAULT_INDEXDB_TABLES), dfs_to_csv)
+        self._db = None
+        self._db_lock = RLock()
+        self.driver = None
+        self._driver_lock = RLock()
+        self._sync_job = None
+        self.jobs = JobRunner()
 
         self.protocol("WM_DELETE_WINDOW", self.__on_closing)
 
         self.create_widgets()
+        self.jobs.poll(self)
+
+    @property
+    def db(self):
+        """The database, created on first use."""
+        with self._db_lock:
+            if self._db is None:
+                from .models import STBDB
+                self.logger.info('Creating database...')
+                self._db = STBDB(descriptor=STBDB.sqlite_descriptor(os.path.join(project_dir, 'data/stb.sqlite')))
+            return self._db
+
+    def get_driver(self):
+        """A method to get the driver, starting it on first use. Blocks, so only call it off the main thread."""
+        with self._driver_lock:
+            if self.driver is None:
+                from .driver import STBDriver
+                self.logger.info('Starting driver...')
+                driver_path = os.path.join(project_dir, 'drivers/geckodriver.exe')
+                self.driver = STBDriver(path=driver_path, headless=True)
+            return self.driver
+
+    def start_sync(self):
+        if self._sync_job is not None:
+            self.logger.debug('Sync already running')
+            return
+        self.set_status('Starte Synchronisierung...')
+        self._sync_job = self.jobs.submit('sync', self._sync, on_done=self._on_sync_done,
+                                          on_error=self._on_sync_error, on_progress=self._on_sync_progress,
+                                          on_cancelled=self._on_sync_cancelled)
+
+    def cancel_sync(self):
+        # the job stays the running sync until it actually stopped, see `_on_sync_cancelled`
+        if self._sync_job is not None and not self._sync_job.cancelled:
+            self._sync_job.cancel()
+            self.set_status('Breche ab...')
+
+    def _sync(self, job):
+        from .models import STBDB
+        from .driver import extract_index_db, index_db_cache_key, STB_HOME_ADDRESS
+        from .lib.cache import DiskCache
+        from .processing import STB_DB_CLEANUP_MAP
+        from .mapping import to_model_frames
+        from .loading import load_dataframes
+        from .aggregates import refresh_aggregates_for
+
+        job.report(0, 1, message='Starte Browser...')
+        driver = self.get_driver()
+        url, tables = STB_HOME_ADDRESS, STBDB.DEFAULT_INDEXDB_TABLES
+        task = extract_index_db(url, tables,
+                                progress=lambda done, total, rows: job.report(done, total, rows, 'Extrahiere...'))
+        # reopening the app and syncing again within a day reads the last extraction from disk
+        cache = DiskCache(os.path.join(project_dir, 'data/cache'))
+        dfs = cache.cached(task, key=index_db_cache_key(url, tables))(driver)
+        job.check()
+        models = to_model_frames({key: STB_DB_CLEANUP_MAP[key](df) for key, df in dfs.items()})
+        job.check()
+        load_dataframes(self.db, models)
+        refresh_aggregates_for(self.db, models)
+        return sum(len(df) for df in dfs.values())
+
+    def start_export(self, path):
+        if not path or path == 'keine datei':
+            self.set_status('Bitte zuerst eine Datei wählen')
+            return
+        self.set_status('Exportiere...')
+        self.jobs.submit('export', lambda job: self._export(path),
+                         on_done=lambda paths: self.set_status(f'Gespeichert unter {paths[0]}'),
+                         on_error=lambda e: self.set_status(f'Fehler: {e}'))
+
+    def _export(self, path):
+        from .exporting import stream_tables, export_tables
+        return export_tables(stream_tables(self.db), path, 'xlsx')
+
+    def _on_sync_progress(self, progress):
+        self.export_tab.progress_bar.configure(maximum=progress.total, value=progress.done)
+        eta = f', noch ca. {progress.eta:.0f}s' if progress.eta is not None else ''
+        self.set_status(f'{progress.message} {progress.done}/{progress.total} Tabellen, {progress.rows} Zeilen{eta}')
+
+    def _on_sync_done(self, rows):
+        self._sync_job = None
+        self.set_status(f'Fertig, {rows} Zeilen synchronisiert')
+
+    def _on_sync_error(self, error):
+        self._sync_job = None
+        self.set_status(f'Fehler: {error}')
+
+    def _on_sync_cancelled(self):
+        self._sync_job = None
+        self.set_status('Abgebrochen')
+
+    def set_status(self, text):
+        self.export_tab.status.set(text)
 
     def create_widgets(self):
         self.title = "STB Liga export"
@@ -106,13 +201,17 @@ class STBApp(tk.Tk):
         main_notebook = ttk.Notebook(self)
         export_tab = ExportTab(self)
         main_notebook.add(export_tab, text="Export", sticky="nsew", padding=3)
+        self.export_tab = export_tab
         visualisation_tab = VisualisationTab(self)
         main_notebook.add(visualisation_tab, text="Visualisierung", sticky="nsew", padding=3)
         main_notebook.grid(column=1, row=3, sticky="nwes", columnspan=3)
 
     def __on_closing(self):
+        self.jobs.shutdown()
         self.destroy()
-        self.driver.quit()
+        with self._driver_lock:
+            if self.driver is not None:
+                self.driver.quit()
 
     @staticmethod
     def ask_saveasfilename(var, *file_types):
@@ -138,7 +237,29 @@ def setup_logging():
     log_filehandler.setFormatter(log_formatter)
     root_logger.addHandler(log_filehandler)
 
-def main():
+def report_startup(started_at, imported_at, initialised_at):
+    """Logs how long the startup took, to be called once the window is shown.
+
+    :param started_at: perf_counter before the ui got imported
+    :param imported_at: perf_counter after the ui got imported
+    :param initialised_at: perf_counter after the app got created
+    """
+    shown_at = perf_counter()
+    heavy_modules = [name for name in ('selenium', 'pandas', 'sqlalchemy', 'bs4', 'matplotlib') if name in sys.modules]
+    logger = logging.getLogger('Startup')
+    logger.info(f'import: {(imported_at - started_at) * 1000:.1f} ms, '
+                f'init: {(initialised_at - imported_at) * 1000:.1f} ms, '
+                f'first window: {(shown_at - started_at) * 1000:.1f} ms')
+    logger.info(f'heavy modules loaded at startup: {", ".join(heavy_modules) or "none"}')
+
+
+def main(*, startup_times=None):
+    """Starts the app.
+
+    :param startup_times: tuple of the perf_counter before and after importing the ui, to report the startup time
+    """
     setup_logging()
     app = STBApp()
+    if startup_times is not None:
+        app.after_idle(report_startup, *startup_times, perf_counter())
     app.mainloop()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+from time import time
+
+import pytest
+
+from src.driver import index_db_cache_key
+from src.lib.cache import DiskCache
+from src.lib.concurrent import make_task_factory
+
+
+@make_task_factory
+def _count(processor, url, tables, **_):
+    processor.append(url)
+    return {table: len(processor) for table in tables}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path), ttl=60)
+
+
+def test_store_and_load(cache):
+    cache.store('ab12', {'a': 1}, validator='etag')
+    entry = cache.load('ab12')
+    assert entry.value == {'a': 1} and entry.validator == 'etag' and entry.fresh
+    assert cache.load('cd34') is None
+
+
+def test_touch_only_refreshes_the_stored_time(cache, tmp_path):
+    cache.store('ab12', list(range(1000)), stored_at=time() - 120)
+    assert not cache.load('ab12').fresh
+    path = os.path.join(str(tmp_path), 'ab', 'ab12.pickle')
+    with open(path, 'rb') as f:
+        before = f.read()
+    cache.touch('ab12')
+    with open(path, 'rb') as f:
+        after = f.read()
+    assert after[8:] == before[8:] and after[:8] != before[:8]
+    assert cache.load('ab12').fresh and cache.load('ab12').value == list(range(1000))
+
+
+def test_keys_are_made_of_plain_values_only():
+    assert DiskCache.make_key('url', tables={'a': 1, 'b': 2}) == DiskCache.make_key('url', tables={'b': 2, 'a': 1})
+    with pytest.raises(AssertionError):
+        DiskCache.make_key('url', progress=lambda *_: None)
+
+
+def test_index_db_cache_key():
+    assert index_db_cache_key('http://x', ['b', 'a']) == index_db_cache_key('http://x', ('a', 'b'), 'bulk')
+    assert index_db_cache_key('http://x', ['a']) != index_db_cache_key('http://x', ['a'], 'async')
+
+
+def test_cached_task_runs_once(cache):
+    calls = []
+    key = index_db_cache_key('http://x', ['a'])
+    # the progress callback would make a key built from the task arguments differ between runs
+    first = cache.cached(_count('http://x', ['a'], progress=lambda *_: None), key=key)(calls)
+    second = cache.cached(_count('http://x', ['a'], progress=lambda *_: None), key=key)(calls)
+    assert first == second == {'a': 1}
+    assert calls == ['http://x']
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from src.crawling import plan_crawl, CrawlPlanner
+from src.lib.concurrent import ConcurrentProcessor, make_task_factory
+
+URL = 'http://127.0.0.1/tabelle?saison={season}&liga={league}'
+
+
+@make_task_factory
+def _visit(processor, url):
+    return url
+
+
+@pytest.fixture
+def processor():
+    processor = ConcurrentProcessor(max_workers=2)
+    yield processor
+    processor.quit()
+
+
+def test_plan_crawl_with_the_store_layout():
+    saison = pd.DataFrame({'id': [2022, 2023]})
+    tabelle = pd.DataFrame({'id': [1, 2], 'name': ['Verbandsliga Nord', 'Landesliga Süd']})
+    targets = plan_crawl(saison, tabelle, URL)
+    assert [(target.season, target.league, target.priority) for target in targets] == [
+        (2023, 1, 0), (2023, 2, 0), (2022, 1, 1), (2022, 2, 1)]
+    assert targets[0].url == 'http://127.0.0.1/tabelle?saison=2023&liga=1'
+
+
+def test_plan_crawl_with_leagues_per_season():
+    saison = pd.DataFrame({'id': [2022, 2023]})
+    tabelle = pd.DataFrame({'id': [1, 2, 2], 'saison': [2022, 2023, 2023]})
+    targets = plan_crawl(saison, tabelle, URL, current_season=2022)
+    assert [(target.season, target.league, target.priority) for target in targets] == [(2022, 1, 0), (2023, 2, 1)]
+
+
+def test_planner_releases_the_slot_of_a_target_that_failed_to_start(processor):
+    def task_factory(url):
+        if url.endswith('liga=1'):
+            raise ValueError(url)
+        return _visit(url)
+
+    saison = pd.DataFrame({'id': [2022, 2023]})
+    tabelle = pd.DataFrame({'id': [1, 2]})
+    planner = CrawlPlanner(processor, max_concurrency=1, rate_per_host=1000, burst=4)
+    results, errors = planner.run(plan_crawl(saison, tabelle, URL), task_factory)
+    assert sorted(target.league for target in results) == [2, 2]
+    assert sorted(target.league for target in errors) == [1, 1]
+    assert all(isinstance(e, ValueError) for e in errors.values())
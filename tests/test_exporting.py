@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+from src import exporting
+from src.exporting import export_tables, stream_tables, read_tables
+from src.lib.helpers import Singleton
+from src.models import STBDB, League
+
+
+@pytest.fixture
+def db(tmp_path):
+    # STBDB is a singleton, every test gets a new database, file backed so the tables can be read side by side
+    Singleton._instances.pop(STBDB, None)
+    db = STBDB(descriptor=STBDB.sqlite_descriptor(str(tmp_path / 'stb.sqlite')))
+    with db.get_session() as session:
+        session.execute(League.__table__.insert(), [{'id': i, 'name': f'Liga {i}', 'level': 'VERBANDS'}
+                                                    for i in range(1, 26)])
+    db.set_sync_chunks('tabelle', [{'first': 1, 'last': 25, 'digest': 'abc'}])
+    yield db
+    Singleton._instances.pop(STBDB, None)
+
+
+def _sheets(path):
+    with zipfile.ZipFile(path) as workbook:
+        names = re.findall(r'<sheet name="([^"]+)"', workbook.read('xl/workbook.xml').decode())
+        rows = [len(re.findall(r'<row ', workbook.read(f'xl/worksheets/sheet{i + 1}.xml').decode()))
+                for i in range(len(names))]
+    return dict(zip(names, rows))
+
+
+def test_sync_bookkeeping_is_left_out_by_default(db):
+    assert 'sync_chunks' not in read_tables(db)
+    assert 'sync_chunks' not in stream_tables(db)
+    assert len(read_tables(db, ['sync_chunks'])['sync_chunks']) == 1
+
+
+def test_streamed_xlsx_continues_on_further_sheets(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(exporting, 'EXCEL_MAX_ROWS', 11)
+    path = str(tmp_path / 'stb.xlsx')
+    export_tables(stream_tables(db, ['leagues', 'teams'], chunk_size=7), path, 'xlsx')
+    # header plus ten rows per sheet, an empty table still gets its header
+    assert _sheets(path) == {'leagues': 11, 'leagues (2)': 11, 'leagues (3)': 6, 'teams': 1}
+
+
+def test_streamed_csv_matches_the_table(db, tmp_path):
+    export_tables(stream_tables(db, ['leagues'], chunk_size=7), str(tmp_path), 'csv')
+    df = pd.read_csv(os.path.join(str(tmp_path), 'leagues.csv'), index_col=0)
+    assert df.index.tolist() == list(range(25)) and df['id'].tolist() == list(range(1, 26))
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'feather'])
+def test_arrow_formats_write_every_table(db, tmp_path, fmt):
+    pytest.importorskip('pyarrow')
+    paths = export_tables(stream_tables(db, chunk_size=7), str(tmp_path), fmt)
+    assert sorted(os.path.basename(path) for path in paths) == sorted(
+        f'{name}.{fmt}' for name in db.Model.metadata.tables if name != 'sync_chunks')
+    leagues = getattr(pd, f'read_{fmt}')(os.path.join(str(tmp_path), f'leagues.{fmt}'))
+    assert len(leagues) == 25 and set(leagues['level']) == {'VERBANDS'}
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from src.lib.concurrent import ConcurrentProcessor
+from src.lib.concurrent.graph import TaskGraph
+
+
+def _fail(*_):
+    raise ValueError('failed')
+
+
+@pytest.fixture
+def processor():
+    processor = ConcurrentProcessor(max_workers=2)
+    yield processor
+    processor.quit()
+
+
+def test_failed_node_cancels_its_descendants(processor):
+    graph = TaskGraph()
+    graph.add('a', lambda: 1).add('b', _fail).add('c', lambda a, b: a + b, depends_on=('a', 'b'))
+    graph.add('d', lambda a: a * 2, depends_on=('a',))
+    run = graph.run(processor)
+    assert run.wait(timeout=5) == {'a': 1, 'd': 2}
+    assert list(run.errors) == ['b']
+    assert run.futures['c'].cancelled()
+
+
+def test_diamond_with_both_parents_failing(processor):
+    graph = TaskGraph()
+    graph.add('root', lambda: 1)
+    graph.add('left', _fail, depends_on=('root',)).add('right', _fail, depends_on=('root',))
+    graph.add('join', lambda left, right: left + right, depends_on=('left', 'right'))
+    graph.add('after', lambda join: join, depends_on=('join',))
+    # comes after the shared dependent in the dependents of 'right'
+    graph.add('beside', lambda right: right, depends_on=('right',))
+    run = graph.run(processor)
+    assert run.wait(timeout=5) == {'root': 1}
+    assert all(fut.done() for fut in run.futures.values())
+    assert sorted(run.errors) == ['left', 'right']
+    assert all(run.futures[name].cancelled() for name in ('join', 'after', 'beside'))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.driver import sync_index_db, _records_from_payload
+from src.exporting import count_rows, read_tables
+from src.lib.helpers import Singleton
+from src.loading import load_dataframes
+from src.mapping import to_model_frames
+from src.models import STBDB
+from src.processing import STB_DB_CLEANUP_MAP
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+STORES = ('tabelle', 'mannschaft', 'person', 'begegnung')
+URL = 'http://127.0.0.1/'
+
+
+def _cleaned_stores():
+    ret = {}
+    for store in STORES:
+        with open(os.path.join(FIXTURES, store + '.json'), encoding='utf-8') as f:
+            ret[store] = STB_DB_CLEANUP_MAP[store](pd.DataFrame(_records_from_payload(json.load(f), store)))
+    return ret
+
+
+class FakeDriver:
+    """Answers the sync script of `sync_index_db` with one columnar chunk per table, recording the marks it got."""
+    def __init__(self, rows):
+        self._logger = logging.getLogger('FakeDriver')
+        self.rows = rows
+        self.known = []
+
+    @contextmanager
+    def open_new_tab(self, url, **kwargs):
+        yield
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, table, known, chunk_size):
+        self.known.append(known)
+        rows = self.rows[table]
+        digest = f'{table}-{len(rows)}'
+        changed = not known or known[0]['digest'] != digest
+        chunk = {'first': rows[0]['id'], 'last': rows[-1]['id'], 'digest': digest, 'changed': changed}
+        columns = {key: [row.get(key) for row in rows] for key in rows[0]} if changed else {}
+        return {'chunks': json.dumps([chunk]), 'rows': json.dumps(columns)}
+
+
+@pytest.fixture
+def db():
+    # STBDB is a singleton, every test gets a new in-memory database
+    Singleton._instances.pop(STBDB, None)
+    yield STBDB()
+    Singleton._instances.pop(STBDB, None)
+
+
+def test_maps_stores_onto_models():
+    models = to_model_frames(_cleaned_stores())
+    assert list(models) == ['leagues', 'teams', 'gymnasts', 'standoffs', 'routines']
+    assert models['leagues'][['id', 'name', 'level']].values.tolist() == [
+        [1, 'Verbandsliga Nord', 'VERBANDS'], [2, 'Landesliga Süd', 'LANDES']]
+    assert models['teams']['league_id'].tolist() == [1, 1, 2]
+    assert models['gymnasts'][['firs_tname', 'last_name', 'team_id']].values.tolist() == [
+        ['Anna', 'Schmidt', 1], ['Jonas', 'Weber', 2]]
+    standoff = models['standoffs'].iloc[0]
+    assert (standoff['timestamp'], standoff['season'], standoff['location']) == (date(2023, 3, 11), 2023,
+                                                                                 'Sporthalle Nord')
+    assert (standoff['host_id'], standoff['guest_id']) == (1, 2)
+    # the nested wertungen become routines numbered within their standoff
+    assert models['routines'].to_dict('records') == [
+        {'id': 100000, 'E': 8.2, 'D': 4.1, 'event': 'BODEN', 'gymnast_id': 10, 'standoff_id': 100}]
+
+
+def test_drops_rows_missing_a_required_value():
+    stores = _cleaned_stores()
+    stores['person'].loc[1, 'nachname'] = None
+    assert to_model_frames(stores)['gymnasts']['id'].tolist() == [10]
+
+
+def test_upsert_is_idempotent(db):
+    stores = _cleaned_stores()
+    loaded = load_dataframes(db, stores)
+    assert loaded == {'leagues': 2, 'teams': 3, 'gymnasts': 2, 'standoffs': 2, 'routines': 1}
+    counts = count_rows(db, list(loaded))
+    load_dataframes(db, stores)
+    assert count_rows(db, list(loaded)) == counts
+
+    # a changed row replaces the stored one
+    stores['mannschaft'].loc[0, 'name'] = 'TV Aachen 1848'
+    load_dataframes(db, stores)
+    teams = read_tables(db, ['teams'])['teams'].set_index('id')
+    assert teams.loc[1, 'name'] == 'TV Aachen 1848' and len(teams) == 3
+
+
+def test_sync_marks_are_stored_with_the_rows_and_reused(db):
+    with open(os.path.join(FIXTURES, 'person.json'), encoding='utf-8') as f:
+        driver = FakeDriver({'person': json.load(f)['person']})
+    # a team the gymnasts belong to
+    load_dataframes(db, {'mannschaft': STB_DB_CLEANUP_MAP['mannschaft'](pd.DataFrame([
+        {'id': 1, 'name': 'TV Aachen', 'tabelle_id': 1}, {'id': 2, 'name': 'TSV Bonn', 'tabelle_id': 1}]))})
+
+    result = sync_index_db(URL, ['person'], db)(driver)
+    assert driver.known == [[]]
+    assert db.get_sync_chunks('person', source=URL) == []
+    load_dataframes(db, {'person': STB_DB_CLEANUP_MAP['person'](result.frames['person'])}, sync_marks=result.marks)
+
+    marks = [{'first': 10, 'last': 11, 'digest': 'person-2'}]
+    assert db.get_sync_chunks('person', source=URL) == marks
+    assert db.get_sync_chunks('person', source='http://elsewhere/') == []
+    # nothing changed since, so no rows are transferred again
+    result = sync_index_db(URL, ['person'], db)(driver)
+    assert driver.known[-1] == marks
+    assert result.frames['person'].empty and result.marks[URL, 'person'] == marks
+
+
+def test_sync_marks_are_rolled_back_with_a_failed_load(db):
+    marks = {(URL, 'begegnung'): [{'first': 1, 'last': 2, 'digest': 'abc'}]}
+    # E is required, a frame keyed by the table name is loaded without being mapped
+    routines = pd.DataFrame([{'id': 1, 'E': None, 'D': 4.0, 'event': 'BODEN', 'gymnast_id': 1, 'standoff_id': 1}])
+    with pytest.raises(IntegrityError):
+        load_dataframes(db, {'routines': routines}, sync_marks=marks)
+    assert db.get_sync_chunks('begegnung', source=URL) == []
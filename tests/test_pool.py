@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from src.lib.concurrent import make_task_factory, RetryPolicy
+from src.lib.driver import DriverPool
+from src.lib.driver import base
+
+
+class FakeFirefox:
+    """Stands in for a started firefox, stops responding once crashed."""
+    def __init__(self):
+        self.crashed = False
+
+    def execute_script(self, script, *args):
+        if self.crashed:
+            raise WebDriverException('browser crashed')
+        return 1
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+@make_task_factory(retry=RetryPolicy(max_attempts=2, base_delay=0, retry_on=(WebDriverException,)))
+def _crash_once(browser, attempts):
+    attempts.append(browser._resource)
+    if len(attempts) == 1:
+        browser._resource.crashed = True
+        raise WebDriverException('browser crashed')
+    return 'done'
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(base, 'start_firefox', lambda **_: FakeFirefox())
+    pool = DriverPool(size=1)
+    yield pool
+    pool.quit()
+
+
+def _counters(metrics):
+    return {counter['name']: counter['value'] for counter in metrics.snapshot()['counters']}
+
+
+def test_pooled_browsers_count_retries_and_restarts(pool):
+    attempts = []
+    assert pool.do(_crash_once(attempts)).result(timeout=5) == 'done'
+    # the retry ran on a restarted browser
+    assert attempts[0] is not attempts[1]
+    counters = _counters(pool.metrics)
+    assert counters['task_retries'] == 1
+    assert counters['browser_restarts'] == 1
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from src.processing import cleanup_table, TableSchema, STB_DB_CLEANUP_MAP
+
+
+def _begegnung():
+    return pd.DataFrame({
+        'id': [1, 2, '3'],
+        'saison': [2023, 2023, None],
+        'datum': ['2023-03-11', '2023-03-18', 'unbekannt'],
+        'heim_id': [1, 2, 1],
+        'gast_id': [2, 1, 2],
+        'halle': [{'name': 'Nord', 'ort': 'Aachen'}, {'name': 'Rhein', 'ort': 'Bonn'}, None],
+        'punkte': [0.5, 1.25, np.nan],
+        'score': [248.2, 251.35, 239.9],
+    })
+
+
+def test_declared_dtypes_and_dates():
+    df = STB_DB_CLEANUP_MAP['begegnung'](_begegnung())
+    assert df['id'].dtype == 'Int32' and df['id'].tolist() == [1, 2, 3]
+    assert df['saison'].dtype == 'Int16' and df['saison'].isna().tolist() == [False, False, True]
+    assert df['heim_id'].dtype == 'Int32' and df['gast_id'].dtype == 'Int32'
+    assert df['datum'].dtype.kind == 'M'
+    assert df['datum'].dt.day.tolist()[:2] == [11, 18] and pd.isna(df['datum'].iloc[2])
+
+
+def test_flattens_nested_objects():
+    df = STB_DB_CLEANUP_MAP['begegnung'](_begegnung())
+    assert 'halle' not in df
+    assert df['halle.name'].tolist()[:2] == ['Nord', 'Rhein'] and pd.isna(df['halle.name'].iloc[2])
+
+
+def test_downcasts_floats_without_losing_digits():
+    df = STB_DB_CLEANUP_MAP['begegnung'](_begegnung())
+    # halves and quarters are exact in float32, scores with tenths are not
+    assert df['punkte'].dtype == np.float32
+    assert df['score'].dtype == np.float64 and df['score'].tolist() == [248.2, 251.35, 239.9]
+
+
+def test_downcasts_integers_and_encodes_categories():
+    df = cleanup_table(pd.DataFrame({'count': [1, 2, 3, 4], 'verein': ['TV A', 'TV A', 'TV A', 'TV B']}))
+    assert df['count'].dtype == np.int8
+    assert df['verein'].dtype == 'category'
+
+
+def test_declared_integer_dates_are_epoch_milliseconds():
+    schema = TableSchema(dates=('erstellt',))
+    df = cleanup_table(pd.DataFrame({'erstellt': [1678492800000], 'spielzeit': [2023]}), schema)
+    assert df['erstellt'].iloc[0] == pd.Timestamp('2023-03-11')
+    # an undeclared integer column is left a number, even if its name looks like a date
+    assert df['spielzeit'].dtype.kind == 'i'
+
+
+def test_leaves_the_given_frame_as_it_is():
+    # with and without nested objects, which are flattened into a new frame anyway
+    for raw in (_begegnung(), _begegnung().drop(columns='halle')):
+        expected = raw.copy()
+        STB_DB_CLEANUP_MAP['begegnung'](raw)
+        pd.testing.assert_frame_equal(raw, expected)